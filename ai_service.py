@@ -1,22 +1,223 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 import json
 
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from suggestion_cache import SuggestionCache, normalize_title
+from suggestion_rules import KeywordClassifier
+
+# Suggestions by normalized title; see suggestion_cache.py for the tiers
+suggestion_cache = SuggestionCache.from_env()
+
+# Titles sent to the model per prompt by get_ai_suggestions_batch, and prompts in flight per batch
+BATCH_CHUNK_SIZE = int(os.getenv("SUGGEST_BATCH_CHUNK_SIZE", "25"))
+BATCH_CONCURRENCY = int(os.getenv("SUGGEST_BATCH_CONCURRENCY", "4"))
+
+# Keyword rules for _rule_based_fallback; SUGGESTION_RULES_FILE replaces the defaults
+fallback_rules = KeywordClassifier.from_env()
+
+# Seconds one model call may take before we give up and use the fallback
+MODEL_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "10"))
+
+# Stops calling the model for a while once it keeps failing or timing out
+model_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("GEMINI_BREAKER_COOLDOWN", "30")),
+    half_open_max_calls=int(os.getenv("GEMINI_BREAKER_TRIAL_CALLS", "1")),
+)
+
 def get_ai_suggestions(title: str) -> dict:
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    if not GEMINI_API_KEY:
+    cached = suggestion_cache.get(title)
+    if cached is not None:
+        return cached
+    model = _get_model()
+    if model is None:
+        return _rule_based_fallback(title)
+
+    try:
+        suggestions = _parse_suggestions(_generate(model, _build_prompt(title)))
+    except Exception as e:
+        print(f"Error calling Gemini API or parsing response: {e}. Using rule-based fallback.")
+        suggestions = _rule_based_fallback(title)
+    suggestion_cache.set(title, suggestions)
+    return suggestions
+
+async def get_ai_suggestions_async(title: str) -> dict:
+    """
+    Same as get_ai_suggestions, but awaits the model's async API so a slow
+    upstream call holds a coroutine instead of a worker thread.
+    """
+    cached = suggestion_cache.get(title)
+    if cached is not None:
+        return cached
+    model = _get_model()
+    if model is None:
+        return _rule_based_fallback(title)
+
+    try:
+        suggestions = _parse_suggestions(await _generate_async(model, _build_prompt(title)))
+    except Exception as e:
+        print(f"Error calling Gemini API or parsing response: {e}. Using rule-based fallback.")
+        suggestions = _rule_based_fallback(title)
+    suggestion_cache.set(title, suggestions)
+    return suggestions
+
+def get_ai_suggestions_batch(titles: list) -> list:
+    """
+    Suggestions for many titles, in input order, with one model call per
+    BATCH_CHUNK_SIZE distinct uncached titles and at most BATCH_CONCURRENCY
+    calls in flight. Only the items the model got wrong (missing, malformed,
+    or a whole chunk failing) use the rule-based fallback.
+    """
+    results, chunks = _plan_batch(titles)
+    model = _get_model() if chunks else None
+    if model is not None:
+        def run(chunk):
+            chunk_titles = [titles[indexes[0]] for indexes in chunk]
+            try:
+                answers = _parse_batch_suggestions(_generate(model, _build_batch_prompt(chunk_titles)), len(chunk))
+            except Exception as e:
+                print(f"Error calling Gemini API or parsing batch response: {e}. Using rule-based fallback.")
+                answers = [None] * len(chunk)
+            _apply_batch_answers(titles, results, chunk, answers)
+
+        if len(chunks) == 1:
+            run(chunks[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(chunks))) as executor:
+                list(executor.map(run, chunks))
+    return _finish_batch(titles, results)
+
+async def get_ai_suggestions_batch_async(titles: list) -> list:
+    """Same as get_ai_suggestions_batch, with the chunks awaited on the running loop."""
+    results, chunks = _plan_batch(titles)
+    model = _get_model() if chunks else None
+    if model is not None:
+        slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def run(chunk):
+            chunk_titles = [titles[indexes[0]] for indexes in chunk]
+            try:
+                async with slots:
+                    text = await _generate_async(model, _build_batch_prompt(chunk_titles))
+                answers = _parse_batch_suggestions(text, len(chunk))
+            except Exception as e:
+                print(f"Error calling Gemini API or parsing batch response: {e}. Using rule-based fallback.")
+                answers = [None] * len(chunk)
+            _apply_batch_answers(titles, results, chunk, answers)
+
+        await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return _finish_batch(titles, results)
+
+def _plan_batch(titles: list):
+    """(results with cached suggestions filled in, chunks of index lists per distinct uncached title)."""
+    results = [None] * len(titles)
+    pending = {}  # normalized title -> indexes still without a suggestion
+    for index, title in enumerate(titles):
+        cached = suggestion_cache.get(title)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.setdefault(normalize_title(title), []).append(index)
+    groups = list(pending.values())
+    return results, [groups[start:start + BATCH_CHUNK_SIZE] for start in range(0, len(groups), BATCH_CHUNK_SIZE)]
+
+def _apply_batch_answers(titles: list, results: list, chunk: list, answers: list):
+    for indexes, answer in zip(chunk, answers):
+        title = titles[indexes[0]]
+        if answer is None:
+            answer = _rule_based_fallback(title)
+        suggestion_cache.set(title, answer)
+        for index in indexes:
+            results[index] = dict(answer)
+
+def _finish_batch(titles: list, results: list) -> list:
+    # Without an API key the model was never asked
+    return [result if result is not None else _rule_based_fallback(title) for title, result in zip(titles, results)]
+
+class _ModelHolder:
+    """
+    The configured GenerativeModel, built on first use and shared by all threads.
+
+    genai.configure() replaces the process-wide API client (and its gRPC
+    channel), so doing it per call made every request pay for client setup.
+    The model is rebuilt only when GEMINI_API_KEY or GEMINI_MODEL changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (api_key, model_name, model), swapped as one tuple so readers need no lock
+        self._current = None
+
+    def get(self):
+        api_key = os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            return None
+        model_name = os.environ.get("GEMINI_MODEL", "gemini-pro")
+        current = self._current
+        if current is not None and current[0] == api_key and current[1] == model_name:
+            return current[2]
+        with self._lock:
+            current = self._current
+            if current is None or current[0] != api_key or current[1] != model_name:
+                genai.configure(api_key=api_key)
+                current = self._current = (api_key, model_name, genai.GenerativeModel(model_name))
+            return current[2]
+
+    def reset(self):
+        with self._lock:
+            self._current = None
+
+_model_holder = _ModelHolder()
+
+def _get_model():
+    """Return the shared configured model, or None when the API key is not set."""
+    model = _model_holder.get()
+    if model is None:
         # Fallback if API key is not set, as Gemini API won't work
         # This is considered a fallback scenario
         print("GEMINI_API_KEY not found. Using rule-based fallback.")
-        return _rule_based_fallback(title)
+    return model
 
+def _request_options():
+    # The client's default retry policy keeps retrying for up to 10 minutes;
+    # make one attempt and let the circuit breaker deal with repeated failures
+    return {"retry": None, "timeout": MODEL_TIMEOUT}
 
-    genai.configure(api_key=GEMINI_API_KEY)
+def _generate(model, prompt: str) -> str:
+    """Response text for prompt, within MODEL_TIMEOUT. Raises CircuitOpenError while the breaker is open."""
+    if not model_breaker.allow():
+        raise CircuitOpenError("Gemini API circuit is open")
+    try:
+        response = model.generate_content(prompt, request_options=_request_options())
+    except Exception:
+        model_breaker.record_failure()
+        raise
+    # The model answered; whether the answer parses is not a sign of an outage
+    model_breaker.record_success()
+    return response.text
 
-    # For text-only input, use the gemini-pro model
-    model = genai.GenerativeModel('gemini-pro')
+async def _generate_async(model, prompt: str) -> str:
+    if not model_breaker.allow():
+        raise CircuitOpenError("Gemini API circuit is open")
+    try:
+        response = await asyncio.wait_for(
+            model.generate_content_async(prompt, request_options=_request_options()), MODEL_TIMEOUT)
+    except Exception:
+        model_breaker.record_failure()
+        raise
+    except asyncio.CancelledError:
+        # The caller went away; that says nothing about the model
+        model_breaker.release()
+        raise
+    model_breaker.record_success()
+    return response.text
 
-    prompt = f"""
+def _build_prompt(title: str) -> str:
+    return f"""
     Analyze the following task title and suggest a 'priority' (Low, Medium, High) and a 'label' (e.g., Work, Personal, Shopping, Study, Home, Health, Finance, Other).
     Return the response as a JSON object with keys "priority" and "label".
     Only return the JSON object, do not include any other text or formatting.
@@ -24,56 +225,48 @@ def get_ai_suggestions(title: str) -> dict:
     Task Title: "{title}"
     """
 
-    try:
-        response = model.generate_content(prompt)
-        # Assuming the model returns a JSON string in its text response
-        json_response = json.loads(response.text)
-        
-        priority = json_response.get("priority", "Medium")
-        label = json_response.get("label", "Other")
-        
-        return {"priority": priority, "label": label, "fallback": False} # Indicate not a fallback
-    except Exception as e:
-        print(f"Error calling Gemini API or parsing response: {e}. Using rule-based fallback.")
-        return _rule_based_fallback(title)
+def _parse_suggestions(text: str) -> dict:
+    # Assuming the model returns a JSON string in its text response
+    json_response = json.loads(text)
+
+    priority = json_response.get("priority", "Medium")
+    label = json_response.get("label", "Other")
+
+    return {"priority": priority, "label": label, "fallback": False} # Indicate not a fallback
+
+def _build_batch_prompt(titles: list) -> str:
+    numbered = "\n".join(f"{index}. {json.dumps(title)}" for index, title in enumerate(titles))
+    return f"""
+    Analyze each of the following task titles and suggest a 'priority' (Low, Medium, High) and a 'label' (e.g., Work, Personal, Shopping, Study, Home, Health, Finance, Other).
+    Return the response as a JSON array with one object per title, each with keys "index", "priority" and "label", where "index" is the number in front of the title.
+    Only return the JSON array, do not include any other text or formatting.
+
+    Task Titles:
+    {numbered}
+    """
+
+def _parse_batch_suggestions(text: str, count: int) -> list:
+    """Return one suggestion per title, or None for titles the response has no usable answer for."""
+    items = json.loads(text)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array")
+    answers = [None] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index", position)
+        priority = item.get("priority")
+        label = item.get("label")
+        if isinstance(index, int) and 0 <= index < count and isinstance(priority, str) and isinstance(label, str):
+            answers[index] = {"priority": priority, "label": label, "fallback": False}
+    return answers
 
 def _rule_based_fallback(title: str) -> dict:
     """
     Implements rule-based fallback logic for AI suggestions.
     """
-    title_lower = title.lower()
-    
-    fallback_suggestions = {}
-
-    # Keyword matching for priority and label
-    if "urgent" in title_lower or "now" in title_lower or "critical" in title_lower:
-        fallback_suggestions["priority"] = "High"
-        fallback_suggestions["label"] = "Urgent"
-    elif "meeting" in title_lower or "report" in title_lower or "work" in title_lower:
-        fallback_suggestions["priority"] = "Medium"
-        fallback_suggestions["label"] = "Work"
-    elif "groceries" in title_lower or "shop" in title_lower or "buy" in title_lower:
-        fallback_suggestions["priority"] = "Low"
-        fallback_suggestions["label"] = "Shopping"
-    elif "study" in title_lower or "read" in title_lower or "learn" in title_lower:
-        fallback_suggestions["priority"] = "Medium"
-        fallback_suggestions["label"] = "Study"
-    elif "home" in title_lower or "clean" in title_lower or "chores" in title_lower:
-        fallback_suggestions["priority"] = "Low"
-        fallback_suggestions["label"] = "Home"
-    elif "health" in title_lower or "doctor" in title_lower or "exercise" in title_lower:
-        fallback_suggestions["priority"] = "Medium"
-        fallback_suggestions["label"] = "Health"
-    elif "finance" in title_lower or "bill" in title_lower or "pay" in title_lower:
-        fallback_suggestions["priority"] = "High" # Financial tasks often high priority
-        fallback_suggestions["label"] = "Finance"
-    else:
-        # Default fallback if no keywords match
-        fallback_suggestions["priority"] = "Low"
-        fallback_suggestions["label"] = "Other"
-    
-    fallback_suggestions["fallback"] = True # Indicate that fallback was used
-    return fallback_suggestions
+    priority, label = fallback_rules.classify(title)
+    return {"priority": priority, "label": label, "fallback": True} # Indicate that fallback was used
 
 if __name__ == '__main__':
     # Example usage (requires GEMINI_API_KEY to be set in environment)
@@ -1,40 +1,698 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, make_response, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, date, timedelta, timezone # Import date and timedelta for calculations
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Engine, event, make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateColumn
+from operator import attrgetter
+import click
 import os
+import base64
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import the get_ai_suggestions function
-from ai_service import get_ai_suggestions
+from ai_service import get_ai_suggestions, get_ai_suggestions_batch, model_breaker, suggestion_cache
+from ttl_cache import TTLCache
+from event_stream import EventBroker
+from prefork_server import PreforkServer
+import metrics
+from query_log import SlowQueryLog, format_query_plan, summarize_parameters
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Output matches the default provider's,
+    except that NaN and infinities become null where the default writes NaN and
+    Infinity (which are not JSON). Anything orjson refuses, such as dict keys
+    that are not strings, is encoded by the default provider instead.
+    """
+
+    def dumps(self, obj, **kwargs):
+        # jsonify goes through response(), which asks for compact separators
+        # (or indent=2 in debug mode); both have orjson equivalents
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        indent = kwargs.pop('indent', None)
+        # Compact unless indenting, where json's default is ': ' like OPT_INDENT_2
+        separators = kwargs.pop('separators', None) or ((',', ':') if indent is None else None)
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        compact = indent is None and tuple(separators) == (',', ':')
+        if not kwargs and (compact or (indent == 2 and separators is None)):
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode()
+            except TypeError:
+                pass  # e.g. {1: 'a'}, which the default provider writes as {"1": "a"}
+        return super().dumps(obj, indent=indent, separators=separators, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+def sqlite_engine_options(uri, pool_size=10, max_overflow=20):
+    """
+    Engine options for a SQLite URI. File databases get a bounded QueuePool so
+    each worker thread reuses a warm connection; in-memory databases are left to
+    Flask-SQLAlchemy, which shares a single connection through a StaticPool.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return {}
+    return {
+        'poolclass': QueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': 30,
+    }
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in app.config['SQLITE_PRAGMAS'].items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(app.instance_path, 'tasks.db')}"
+# orjson is an optional speed-up; without it Flask's stdlib encoder is used
+if orjson is not None and os.getenv('TASKS_JSON_ENCODER', 'orjson') == 'orjson':
+    app.json = OrjsonProvider(app)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    'DATABASE_URL', f"sqlite:///{os.path.join(app.instance_path, 'tasks.db')}"
+)
 # Ensure the instance folder exists
 try:
     os.makedirs(app.instance_path)
 except OSError:
     pass
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Applied to every new SQLite connection. WAL lets readers keep going while a
+# writer is active, and synchronous=NORMAL only fsyncs at WAL checkpoints.
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KIB', '65536')), # Negative means KiB, not pages
+}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'],
+    pool_size=int(os.getenv('DB_POOL_SIZE', '10')),
+    max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '20')),
+)
+app.config['TASK_LIST_CACHE_SIZE'] = int(os.getenv('TASK_LIST_CACHE_SIZE', '256'))
+app.config['TASK_LIST_CACHE_TTL'] = float(os.getenv('TASK_LIST_CACHE_TTL', '30'))
+# Total size of the cached task list bodies, and the largest body worth caching (bytes)
+app.config['TASK_LIST_CACHE_MAX_BYTES'] = int(os.getenv('TASK_LIST_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+app.config['TASK_LIST_CACHE_MAX_BODY'] = int(os.getenv('TASK_LIST_CACHE_MAX_BODY', str(1024 * 1024)))
+# GET /api/tasks/events replay buffer (events) and keep-alive interval (seconds)
+app.config['TASK_EVENTS_BUFFER_SIZE'] = int(os.getenv('TASK_EVENTS_BUFFER_SIZE', '1000'))
+app.config['TASK_EVENTS_HEARTBEAT'] = float(os.getenv('TASK_EVENTS_HEARTBEAT', '15'))
+# Statements slower than this are logged with their parameters and query plan
+app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100'))
+app.config['SLOW_QUERY_LOG_SIZE'] = int(os.getenv('SLOW_QUERY_LOG_SIZE', '500'))
+# Tombstones of deleted tasks are kept for this many data versions; older sync tokens must resync
+app.config['TOMBSTONE_RETENTION_VERSIONS'] = int(os.getenv('TOMBSTONE_RETENTION_VERSIONS', '100000'))
 db = SQLAlchemy(app)
 
+# Serialized GET /api/tasks bodies keyed by their ETag
+task_list_cache = TTLCache(maxsize=app.config['TASK_LIST_CACHE_SIZE'], ttl=app.config['TASK_LIST_CACHE_TTL'],
+                           maxbytes=app.config['TASK_LIST_CACHE_MAX_BYTES'])
+# GET /api/tasks/stats results, keyed the same way
+task_stats_cache = TTLCache(maxsize=app.config['TASK_LIST_CACHE_SIZE'], ttl=app.config['TASK_LIST_CACHE_TTL'])
+# Task write notifications for GET /api/tasks/events
+task_events = EventBroker(maxlen=app.config['TASK_EVENTS_BUFFER_SIZE'])
+
+# Request metrics, served at /metrics. Values are per process.
+metrics_registry = metrics.Registry()
+http_requests = metrics_registry.counter(
+    'http_requests_total', 'HTTP requests by endpoint, method and status code.', ('endpoint', 'method', 'status'))
+http_request_duration = metrics_registry.histogram(
+    'http_request_duration_seconds', 'Time to build the response, excluding streamed bodies.', ('endpoint', 'method'))
+http_requests_in_flight = metrics_registry.gauge(
+    'http_requests_in_flight', 'Requests currently being handled.', ('endpoint',))
+http_request_db_queries = metrics_registry.histogram(
+    'http_request_db_queries', 'SQL statements executed per request.', ('endpoint',),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100))
+suggestions_served = metrics_registry.counter(
+    'task_suggestions_total', 'Suggestion requests by outcome: model, fallback or error.', ('source',))
+
+# Statements executed by the current thread, read before and after each request
+_thread_queries = threading.local()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    _thread_queries.count = getattr(_thread_queries, 'count', 0) + 1
+    context.query_start_time = time.perf_counter()
+
+# Timing of every statement, grouped by normalized SQL; see /api/admin/slow-queries
+slow_query_log = SlowQueryLog(max_statements=app.config['SLOW_QUERY_LOG_SIZE'])
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _time_query(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context.query_start_time
+    if duration * 1000 < app.config['SLOW_QUERY_THRESHOLD_MS']:
+        slow_query_log.record(statement, duration)
+        return
+    plan = _explain_query_plan(conn, statement, parameters) if not executemany else ''
+    # Bulk inserts bind thousands of rows; only a bounded summary is logged and kept
+    parameters = summarize_parameters(parameters, executemany)
+    slow_query_log.record(statement, duration, parameters, plan)
+    app.logger.warning("Slow query (%.1f ms): %s\nParameters: %r\nQuery plan:\n%s",
+                       duration * 1000, statement, parameters, plan or '(not available)')
+
+def _explain_query_plan(conn, statement, parameters):
+    keyword = statement.lstrip()[:6].upper()
+    if conn.dialect.name != 'sqlite' or not keyword.startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE')):
+        return ''
+    # A separate DBAPI cursor, so the caller's unread results are left alone and no events fire
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        return format_query_plan(cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall())
+    except sqlite3.Error as e:
+        return f"(EXPLAIN failed: {e})"
+    finally:
+        cursor.close()
+
+# The hooks resolve the request proxy once and keep their state on the request itself
+@app.before_request
+def _start_request_metrics():
+    req = request._get_current_object()
+    endpoint = req.endpoint or 'unmatched'
+    req.metrics_start = (endpoint, time.perf_counter(), getattr(_thread_queries, 'count', 0))
+    http_requests_in_flight.inc(endpoint)
+
+@app.after_request
+def _record_request_metrics(response):
+    req = request._get_current_object()
+    started = getattr(req, 'metrics_start', None)
+    if started is not None:
+        endpoint, start_time, start_queries = started
+        http_request_duration.observe(time.perf_counter() - start_time, endpoint, req.method)
+        http_requests.inc(endpoint, req.method, str(response.status_code))
+        http_request_db_queries.observe(getattr(_thread_queries, 'count', 0) - start_queries, endpoint)
+    return response
+
+@app.teardown_request
+def _finish_request_metrics(exc):
+    started = request._get_current_object().__dict__.pop('metrics_start', None)
+    if started is not None:
+        http_requests_in_flight.dec(started[0])
+
+# Allowed priorities and their sortable rank
+VALID_PRIORITIES = ('High', 'Medium', 'Low')
+PRIORITY_RANKS = {'Low': 1, 'Medium': 2, 'High': 3}
+# Legacy priorities outside VALID_PRIORITIES rank below Low: last for
+# sort_by=priority&order=desc but first for order=asc. The CASE this replaced
+# put them last both ways; one indexed rank column can only do that for one
+# direction, and the API no longer accepts such values.
+UNKNOWN_PRIORITY_RANK = 0
+
+def _default_updated_at(context):
+    # New rows start with updated_at == created_at; created_at's default has already run
+    return context.get_current_parameters().get('created_at') or datetime.now(timezone.utc)
+
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     notes = db.Column(db.Text, nullable=True)
     due_date = db.Column(db.Date, nullable=True)
     priority = db.Column(db.String(20), nullable=False, default='Medium')
+    # Integer mirror of priority so sorting is an index walk instead of a CASE per row
+    priority_rank = db.Column(db.Integer, nullable=False, default=PRIORITY_RANKS['Medium'],
+                              server_default=str(PRIORITY_RANKS['Medium']))
     label = db.Column(db.String(50), nullable=True)
     is_done = db.Column(db.Boolean, nullable=False, default=False)
     created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Nullable only so migrate-db can add it in place; it is backfilled from created_at
+    updated_at = db.Column(db.DateTime, nullable=True, default=_default_updated_at,
+                           onupdate=lambda: datetime.now(timezone.utc))
+    # Data version of the transaction that last wrote this row, see /api/tasks/changes
+    change_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Match the filter + sort paths of get_tasks. SQLite appends the rowid (id)
+    # to every index entry, so these also cover the id tiebreaker in ORDER BY.
+    __table_args__ = (
+        db.Index('ix_task_created_at', 'created_at'),
+        db.Index('ix_task_priority_created_at', 'priority', 'created_at'),
+        db.Index('ix_task_priority_rank', 'priority_rank'),
+        db.Index('ix_task_change_version', 'change_version'),
+        db.Index('ix_task_label_created_at', 'label', 'created_at'),
+        db.Index('ix_task_due_date', 'due_date'),
+        db.Index('ix_task_is_done_due_date', 'is_done', 'due_date'),
+    )
+
+    @db.validates('priority')
+    def _sync_priority_rank(self, key, value):
+        self.priority_rank = PRIORITY_RANKS.get(value, UNKNOWN_PRIORITY_RANK)
+        return value
 
     def __repr__(self):
         return f"Task('{self.title}', '{self.due_date}', '{self.priority}')"
 
+# External-content FTS5 index over task titles and notes, kept in sync by triggers.
+# prefix='2 3' adds prefix indexes so short "gro*" style queries stay cheap.
+TASK_FTS_DDL = (
+    "CREATE VIRTUAL TABLE task_fts USING fts5(title, notes, content='task', content_rowid='id', "
+    "prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, notes) VALUES (new.id, new.title, new.notes); END",
+    "CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, notes) VALUES ('delete', old.id, old.title, old.notes); END",
+    "CREATE TRIGGER task_fts_update AFTER UPDATE OF title, notes ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, notes) VALUES ('delete', old.id, old.title, old.notes); "
+    "INSERT INTO task_fts(rowid, title, notes) VALUES (new.id, new.title, new.notes); END",
+)
+task_fts = db.table('task_fts', db.column('rowid'), db.column('rank'), db.column('task_fts'))
+
+@db.event.listens_for(Task.__table__, 'after_create')
+def _create_task_fts(target, connection, **kw):
+    for statement in TASK_FTS_DDL:
+        connection.exec_driver_sql(statement)
+
+@db.event.listens_for(Task.__table__, 'before_drop')
+def _drop_task_fts(target, connection, **kw):
+    connection.exec_driver_sql("DROP TABLE IF EXISTS task_fts")
+
+def _priority_rank_expression(priority):
+    """SQL expression computing priority_rank from the priority column, for backfills."""
+    return db.case(*((priority == p, r) for p, r in PRIORITY_RANKS.items()), else_=UNKNOWN_PRIORITY_RANK)
+
+def _backfill_priority_rank():
+    task = db.table('task', db.column('priority'), db.column('priority_rank'))
+    return task.update().values(priority_rank=_priority_rank_expression(task.c.priority))
+
+def _backfill_updated_at():
+    task = db.table('task', db.column('created_at'), db.column('updated_at'))
+    return task.update().values(updated_at=task.c.created_at)
+
+# Backfills run by migrate-db right after the column is added to an existing table. They
+# update a bare table() so onupdate defaults (updated_at) never touch columns not added yet
+COLUMN_BACKFILLS = {
+    ('task', 'priority_rank'): _backfill_priority_rank,
+    ('task', 'updated_at'): _backfill_updated_at,
+}
+
+class TaskTombstone(db.Model):
+    """Remembers deleted task ids so /api/tasks/changes can tell replicas to drop them."""
+    task_id = db.Column(db.Integer, primary_key=True)
+    change_version = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+def _record_tombstones(task_ids_query, version):
+    """
+    Insert (or refresh) tombstones for the task ids selected by task_ids_query,
+    and drop those that fell out of TOMBSTONE_RETENTION_VERSIONS.
+    """
+    now = datetime.now(timezone.utc)
+    statement = sqlite_insert(TaskTombstone).from_select(
+        ['task_id', 'change_version', 'deleted_at'],
+        task_ids_query.add_columns(db.literal(version), db.literal(now, db.DateTime)),
+    )
+    # SQLite ids can be reused once the highest row is deleted, so a tombstone may already exist
+    statement = statement.on_conflict_do_update(
+        index_elements=['task_id'],
+        set_={'change_version': statement.excluded.change_version, 'deleted_at': statement.excluded.deleted_at},
+    )
+    db.session.execute(statement)
+    db.session.execute(db.delete(TaskTombstone).where(
+        TaskTombstone.change_version <= _tombstone_horizon(version)
+    ))
+
+def _tombstone_horizon(version):
+    """Oldest sync token whose deletions are still all known at data version `version`."""
+    return version - app.config['TOMBSTONE_RETENTION_VERSIONS']
+
+class DataVersion(db.Model):
+    """Single-row counter bumped in the same transaction as every task write."""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+def _bump_data_version():
+    """Increment the data version as part of the current session's transaction and return it.
+
+    Call it before the writes themselves: it takes SQLite's write lock, so versions
+    follow commit order and can be stamped on the rows being written.
+    """
+    version = db.session.execute(
+        db.update(DataVersion).where(DataVersion.id == 1)
+        .values(version=DataVersion.version + 1).returning(DataVersion.version)
+    ).scalar()
+    if version is None:
+        version = 1
+        db.session.add(DataVersion(id=1, version=version))
+        db.session.flush()
+    return version
+
+def _current_data_version():
+    # Kept in the database rather than process memory so every worker process agrees
+    version = db.session.execute(
+        db.select(DataVersion.version).where(DataVersion.id == 1)
+    ).scalar()
+    return version or 0
+
+def _list_etag(args):
+    """Strong ETag for a task list request: the data version plus the normalized query."""
+    normalized = sorted((key, value) for key in args for value in args.getlist(key))
+    if 'due_date_within_days' in args:
+        # The matching set moves with the calendar even when no task changes
+        normalized.append(('today', date.today().isoformat()))
+    digest = hashlib.blake2b(repr(normalized).encode(), digest_size=8).hexdigest()
+    return f"v{_current_data_version()}-{digest}"
+
+def _task_filters(args, search=True):
+    """
+    Translate the get_tasks filter arguments (priority, due_date_within_days,
+    due_date_before, label, q) into WHERE clauses. `args` is any mapping with .get,
+    so request.args and JSON objects both work. Raises ValueError on bad input.
+    Pass search=False when the caller matches q against the joined FTS table itself.
+    """
+    priority_filter = args.get('priority')
+    due_date_before_str = args.get('due_date_before')
+    due_date_within_days_str = args.get('due_date_within_days')
+    label_filter = args.get('label')
+    filters = []
+
+    if priority_filter:
+        if priority_filter in VALID_PRIORITIES:
+            filters.append(Task.priority == priority_filter)
+        else:
+            # If an invalid priority is requested, return an empty set of tasks
+            filters.append(Task.priority == "InvalidPriorityFilter")
+
+    # Handle due_date_within_days
+    if due_date_within_days_str not in (None, ''):
+        try:
+            due_date_within_days = int(due_date_within_days_str)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid due_date_within_days format. Must be an integer.")
+        if due_date_within_days < 0:
+            raise ValueError("due_date_within_days must be non-negative")
+        # Calculate the date 'due_date_within_days' from today
+        target_date = date.today() + timedelta(days=due_date_within_days)
+        filters.append(Task.due_date <= target_date)
+
+    elif due_date_before_str: # Only process due_date_before if due_date_within_days is not present
+        try:
+            due_date_before = datetime.strptime(due_date_before_str, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            raise ValueError("Invalid due_date_before format. Use YYYY-MM-DD")
+        filters.append(Task.due_date <= due_date_before)
+
+    if label_filter:
+        filters.append(Task.label == label_filter)
+
+    search_text = args.get('q')
+    if search and search_text:
+        matches = db.select(task_fts.c.rowid).where(task_fts.c.task_fts.match(_fts_query(search_text)))
+        filters.append(Task.id.in_(matches))
+
+    return filters
+
+def _fts_query(text):
+    """Turn free text into a safe FTS5 expression where every word must match as a prefix."""
+    if not isinstance(text, str):
+        raise ValueError("q must be a string")
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        raise ValueError("q must contain at least one word")
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def _seconds_until_midnight():
+    midnight = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    return max(0.0, (midnight - datetime.now()).total_seconds())
+
+def _list_cache_ttl(args):
+    """Cache lifetime for a list response; relative-date queries expire at midnight."""
+    ttl = task_list_cache.ttl
+    if 'due_date_within_days' in args:
+        ttl = min(ttl, _seconds_until_midnight())
+    return ttl
+
+def _publish_task_event(event, payload, version):
+    """Notify event stream subscribers of a committed write; `token` works with /api/tasks/changes."""
+    task_events.publish(event, app.json.dumps({**payload, "token": str(version)}), token=version)
+
+def _stream_data_version():
+    """The data version for event stream subscribers, which run outside any request."""
+    with app.app_context():
+        return _current_data_version()
+
+def _invalidate_task_caches():
+    # Entries are keyed on the data version and could never be served again, free them now
+    task_list_cache.clear()
+    task_stats_cache.clear()
+
+# Column order shared by every task read path and _task_to_dict
+TASK_FIELDS = ('id', 'title', 'notes', 'due_date', 'priority', 'label', 'is_done', 'created_at', 'updated_at')
+TASK_COLUMNS = tuple(Task.__table__.c[field] for field in TASK_FIELDS)
+# notes is unbounded and not shown in the list view, so list queries skip it unless asked
+LIST_DEFAULT_FIELDS = tuple(field for field in TASK_FIELDS if field != 'notes')
+_DATE_FIELDS = ('due_date', 'created_at', 'updated_at')
+_task_values = attrgetter(*TASK_FIELDS)
+
+def _task_to_dict(row, fields=TASK_FIELDS):
+    """Serialize task values given in `fields` order (a Core row or _task_values(task)).
+
+    Extra trailing values in the row are ignored.
+    """
+    if fields is not TASK_FIELDS:
+        data = dict(zip(fields, row))
+        for field in _DATE_FIELDS:
+            value = data.get(field)
+            if value is not None:
+                data[field] = value.isoformat()
+        return data
+
+    task_id, title, notes, due_date, priority, label, is_done, created_at, updated_at, *_ = row
+    return {
+        "id": task_id,
+        "title": title,
+        "notes": notes,
+        "due_date": due_date.isoformat() if due_date is not None else None,
+        "priority": priority,
+        "label": label,
+        "is_done": is_done,
+        "created_at": created_at.isoformat(),
+        # Only null for rows migrate-db has not backfilled yet
+        "updated_at": updated_at.isoformat() if updated_at is not None else None,
+    }
+
+def _parse_fields(fields_str):
+    """Return the requested list fields in TASK_FIELDS order, raising ValueError on unknown names."""
+    if not fields_str:
+        return LIST_DEFAULT_FIELDS
+    requested = {field.strip() for field in fields_str.split(',') if field.strip()}
+    unknown = requested.difference(TASK_FIELDS)
+    if unknown:
+        raise ValueError(f"Invalid fields: {', '.join(sorted(unknown))}")
+    # id is always returned so clients can address the task
+    requested.add('id')
+    if requested.issuperset(TASK_FIELDS):
+        return TASK_FIELDS
+    return tuple(field for field in TASK_FIELDS if field in requested)
+
+SORT_FIELDS = ('priority', 'due_date', 'created_at')
+# Best match first; only available together with q
+RELEVANCE_SORT = 'relevance'
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 500
+BULK_CHUNK_SIZE = 1000
+
+def _resolve_sort(sort_by, order, searching=False):
+    """Return (sort_by, descending), falling back to newest-first for unknown sorts.
+
+    A search without an explicit sort is ordered by relevance.
+    """
+    if searching and sort_by in (None, RELEVANCE_SORT):
+        return RELEVANCE_SORT, False
+    if sort_by not in SORT_FIELDS:
+        return 'created_at', True
+    return sort_by, order == 'desc'
+
+def _sort_key(sort_by, descending):
+    """Return (column, sorts_descending, nullable) for the ORDER BY key."""
+    if sort_by == RELEVANCE_SORT:
+        # bm25 scores are negative, lower is a better match
+        return task_fts.c.rank, False, False
+    if sort_by == 'priority':
+        return Task.priority_rank, descending, False
+    if sort_by == 'due_date':
+        return Task.due_date, descending, True
+    return Task.created_at, descending, False
+
+def _sort_value(row, sort_by):
+    # Rows carry their sort key in a trailing 'sort_key' column, see _query_tasks
+    value = row.sort_key
+    if sort_by in ('priority', RELEVANCE_SORT):
+        return value
+    return value.isoformat() if value is not None else None
+
+def _encode_cursor(task, sort_by, descending):
+    """Build an opaque cursor pointing just past the given task."""
+    payload = [sort_by, descending, _sort_value(task, sort_by), task.id]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_cursor(cursor, sort_by, descending):
+    """Return (key_value, last_id) from a cursor, raising ValueError if it doesn't fit this query."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_desc, key_value, last_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    if cursor_sort != sort_by or cursor_desc != descending or type(last_id) is not int:
+        raise ValueError("Cursor does not match the requested sort")
+
+    if key_value is None:
+        if sort_by != 'due_date':
+            raise ValueError("Cursor is missing its sort key")
+        return None, last_id
+    if sort_by == 'priority':
+        if type(key_value) is not int:
+            raise ValueError("Invalid priority rank in cursor")
+        return key_value, last_id
+    if sort_by == RELEVANCE_SORT:
+        if not isinstance(key_value, (int, float)):
+            raise ValueError("Invalid relevance score in cursor")
+        return float(key_value), last_id
+    if not isinstance(key_value, str):
+        raise ValueError("Invalid sort key in cursor")
+    if sort_by == 'due_date':
+        return datetime.strptime(key_value, '%Y-%m-%d').date(), last_id
+    return datetime.fromisoformat(key_value), last_id
+
+def _after_cursor(key, descending, nullable, key_value, last_id):
+    """Keyset predicate selecting rows strictly after (key_value, last_id) in sort order.
+
+    SQLite sorts NULLs first ascending and last descending, so a nullable key
+    needs the NULL block handled explicitly on either side of the cursor.
+    """
+    if key_value is None:
+        if descending:
+            return db.and_(key.is_(None), Task.id < last_id)
+        return db.or_(db.and_(key.is_(None), Task.id > last_id), key.isnot(None))
+
+    if descending:
+        after = db.or_(key < key_value, db.and_(key == key_value, Task.id < last_id))
+        if nullable:
+            after = db.or_(after, key.is_(None))
+        return after
+    return db.or_(key > key_value, db.and_(key == key_value, Task.id > last_id))
+
 @app.cli.command('init-db')
 def init_db_command():
     """Clear existing data and create new tables."""
     db.create_all()
     print('Initialized the database.')
 
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Bring an existing database up to the current schema without touching data."""
+    created = migrate_schema()
+    if created:
+        print(f"Created: {', '.join(created)}")
+    dropped = _drop_retired_indexes()
+    if dropped:
+        print(f"Dropped: {', '.join(dropped)}")
+    print('Database schema is up to date.')
+
+@app.cli.command('serve')
+@click.option('--host', default=lambda: os.getenv('HOST', '127.0.0.1'), show_default='127.0.0.1')
+@click.option('--port', type=int, default=lambda: int(os.getenv('PORT', '8000')), show_default='8000')
+@click.option('--workers', type=click.IntRange(min=1), default=lambda: int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1))),
+              show_default='WEB_CONCURRENCY or CPU count', help='Worker processes.')
+@click.option('--threads', type=click.IntRange(min=1), default=lambda: int(os.getenv('WEB_THREADS', '8')), show_default='8',
+              help='Request threads per worker.')
+@click.option('--graceful-timeout', type=float, default=30.0, show_default=True,
+              help='Seconds in-flight requests get to finish on shutdown.')
+def serve_command(host, port, workers, threads, graceful_timeout):
+    """Serve the app with pre-forked workers (the production entry point)."""
+    PreforkServer(app, host=host, port=port, workers=workers, threads=threads,
+                  graceful_timeout=graceful_timeout, warm_up=_warm_up_server, post_fork=_warm_up_worker).run()
+
+def _warm_up_server():
+    """Runs once in the master so workers inherit compiled templates and a checked database."""
+    with app.app_context():
+        app.jinja_env.get_template('index.html')
+        if not db.inspect(db.engine).has_table(Task.__tablename__):
+            raise click.ClickException("The database has no task table, run `flask init-db` first")
+        db.session.remove()
+        # Connections must not cross fork(); each worker opens its own
+        db.engine.dispose()
+
+def _warm_up_worker():
+    """Open this worker's first connection (running the SQLite pragmas) before it accepts requests."""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql('SELECT 1')
+
+# Indexes earlier releases created that no query uses any more; they only cost writes
+RETIRED_INDEXES = {'task': ('ix_task_updated_at',)}
+
+def _drop_retired_indexes():
+    inspector = db.inspect(db.engine)
+    dropped = []
+    for table_name, index_names in RETIRED_INDEXES.items():
+        if not inspector.has_table(table_name):
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table_name)}
+        for name in index_names:
+            if name in existing:
+                with db.engine.begin() as conn:
+                    conn.exec_driver_sql(f"DROP INDEX {name}")
+                dropped.append(name)
+    return dropped
+
+def migrate_schema():
+    """Create missing tables, columns and indexes, returning the names of those created."""
+    inspector = db.inspect(db.engine)
+    created = [name for name in db.metadata.tables if not inspector.has_table(name)]
+    db.create_all()
+
+    for table in db.metadata.sorted_tables:
+        if table.name in created:
+            continue
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            # New NOT NULL columns carry a server_default so SQLite can add them in place
+            column_ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+                backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                if backfill is not None:
+                    conn.execute(backfill())
+            created.append(f"{table.name}.{column.name}")
+
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+
+    if Task.__tablename__ not in created and not inspector.has_table('task_fts'):
+        with db.engine.begin() as conn:
+            _create_task_fts(Task.__table__, conn)
+            # Index the rows that existed before the triggers did
+            conn.exec_driver_sql("INSERT INTO task_fts(task_fts) VALUES ('rebuild')")
+        created.append('task_fts')
+    return created
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -42,135 +700,244 @@ def home():
 @app.route('/api/tasks', methods=['POST'])
 def create_task():
     data = request.get_json()
+    values, error = _new_task_values(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    version = _bump_data_version()
+    new_task = Task(**values, change_version=version)
+    db.session.add(new_task)
+    db.session.commit()
+    _invalidate_task_caches()
+
+    task_data = _task_to_dict(_task_values(new_task))
+    _publish_task_event('created', {"task": task_data}, version)
+    return jsonify({"data": task_data}), 201
+
+INVALID_PRIORITY_ERROR = f"Invalid priority. Use one of: {', '.join(VALID_PRIORITIES)}"
+MAX_LABEL_LENGTH = 50
+
+def _text_fields_error(data):
+    """Error message when notes or label are not null or a string; checked before they reach a bind."""
+    for field in ('notes', 'label'):
+        value = data.get(field)
+        if value is not None and not isinstance(value, str):
+            return f"{field.capitalize()} must be a string"
+    label = data.get('label')
+    if label is not None and len(label) > MAX_LABEL_LENGTH:
+        return f"Label must be at most {MAX_LABEL_LENGTH} characters"
+    return None
+
+def _new_task_values(data):
+    """Validate a create payload, returning (column values, None) or (None, error message)."""
+    if not isinstance(data, dict):
+        return None, "Task must be a JSON object"
     title = data.get('title')
     notes = data.get('notes')
     due_date_str = data.get('due_date')
-    priority = data.get('priority', 'Medium') # Default to 'Medium' if not provided
+    priority = data.get('priority') or 'Medium' # Default to 'Medium' if not provided
     label = data.get('label')
 
-    if not title or not title.strip():
-        return jsonify({"error": "Title is required"}), 400
+    if not isinstance(title, str) or not title.strip():
+        return None, "Title is required"
+
+    if priority not in VALID_PRIORITIES:
+        return None, INVALID_PRIORITY_ERROR
+
+    error = _text_fields_error(data)
+    if error:
+        return None, error
 
     due_date = None
     if due_date_str:
         try:
             due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
-
-    new_task = Task(
-        title=title, 
-        notes=notes, 
-        due_date=due_date,
-        priority=priority,
-        label=label
-    )
-    db.session.add(new_task)
+        except (ValueError, TypeError):
+            return None, "Invalid date format. Use YYYY-MM-DD"
+
+    return {
+        "title": title,
+        "notes": notes,
+        "due_date": due_date,
+        "priority": priority,
+        "priority_rank": PRIORITY_RANKS[priority],
+        "label": label
+    }, None
+
+@app.route('/api/tasks/bulk', methods=['POST'])
+def create_tasks_bulk():
+    """
+    Create many tasks in one transaction from a JSON array or an NDJSON body
+    (Content-Type: application/x-ndjson). Invalid items are skipped and reported
+    by their zero-based index; the valid ones are inserted in executemany batches.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        items = _iter_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return jsonify({"error": "Expected a JSON array of tasks"}), 400
+        items = ((item, None) for item in data)
+
+    # Read and validate the whole body before taking the write lock, so a slow
+    # upload doesn't block every other writer while it arrives
+    rows = []
+    errors = []
+    for index, (item, error) in enumerate(items):
+        values = None
+        if error is None:
+            values, error = _new_task_values(item)
+        if error:
+            errors.append({"index": index, "error": error})
+        else:
+            rows.append(values)
+
+    if not rows:
+        status = 400 if errors else 200
+        return jsonify({"data": {"created": 0}, "errors": errors}), status
+
+    insert = Task.__table__.insert()
+    version = _bump_data_version()
+    for values in rows:
+        values['change_version'] = version
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        db.session.execute(insert, rows[start:start + BULK_CHUNK_SIZE])
+    created = len(rows)
+
     db.session.commit()
+    _invalidate_task_caches()
+    # Bulk events only carry a count; subscribers catch up through /api/tasks/changes
+    _publish_task_event('bulk_created', {"count": created}, version)
+    return jsonify({"data": {"created": created}, "errors": errors}), 201
 
-    return jsonify({"data": {
-        "id": new_task.id,
-        "title": new_task.title,
-        "notes": new_task.notes,
-        "due_date": new_task.due_date.isoformat() if new_task.due_date else None,
-        "priority": new_task.priority,
-        "label": new_task.label,
-        "is_done": new_task.is_done,
-        "created_at": new_task.created_at.isoformat()
-    }}), 201
+def _iter_ndjson(stream):
+    """Yield (item, error) per non-blank line so one bad line doesn't sink the batch."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield app.json.loads(line), None
+        except ValueError:
+            yield None, "Invalid JSON"
 
 @app.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    priority_filter = request.args.get('priority')
-    due_date_before_str = request.args.get('due_date_before')
-    due_date_within_days_str = request.args.get('due_date_within_days') # New parameter
-    label_filter = request.args.get('label')
+    etag = _list_etag(request.args)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        # The ETag already identifies this exact body, so it doubles as the cache key
+        body = task_list_cache.get(etag)
+        if body is not None:
+            response = Response(body, mimetype='application/json')
+        else:
+            response = make_response(_query_tasks())
+            if response.status_code != 200:
+                return response
+            if not response.is_streamed:
+                body = response.get_data()
+                # A few unpaginated lists of a large table would push everything else out
+                if len(body) <= app.config['TASK_LIST_CACHE_MAX_BODY']:
+                    task_list_cache.set(etag, body, ttl=_list_cache_ttl(request.args))
+    response.set_etag(etag)
+    # Let browsers keep the list but revalidate it on every fetch
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _query_tasks():
     sort_by = request.args.get('sort_by')
     order = request.args.get('order', 'asc')
+    limit_str = request.args.get('limit')
+    cursor_str = request.args.get('cursor')
 
-    tasks_query = Task.query
+    search = request.args.get('q')
+    sort_by, descending = _resolve_sort(sort_by, order, searching=bool(search))
+    by_relevance = sort_by == RELEVANCE_SORT
 
-    valid_priorities = ['High', 'Medium', 'Low']
-    if priority_filter:
-        if priority_filter in valid_priorities:
-            tasks_query = tasks_query.filter_by(priority=priority_filter)
-        else:
-            # If an invalid priority is requested, return an empty set of tasks
-            tasks_query = tasks_query.filter(Task.priority == "InvalidPriorityFilter") 
-    
-    # Handle due_date_within_days
-    if due_date_within_days_str:
-        try:
-            due_date_within_days = int(due_date_within_days_str)
-            if due_date_within_days < 0:
-                return jsonify({"error": "due_date_within_days must be non-negative"}), 400
-            
-            # Calculate the date 'due_date_within_days' from today
-            target_date = date.today() + timedelta(days=due_date_within_days)
-            tasks_query = tasks_query.filter(Task.due_date <= target_date)
-        except ValueError:
-            return jsonify({"error": "Invalid due_date_within_days format. Must be an integer."}), 400
+    try:
+        fields = _parse_fields(request.args.get('fields'))
+        # Ranking needs the FTS table joined, which then does the matching itself
+        filters = _task_filters(request.args, search=not by_relevance)
+        if by_relevance:
+            filters.append(task_fts.c.task_fts.match(_fts_query(search)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    elif due_date_before_str: # Only process due_date_before if due_date_within_days is not present
+    # Plain column tuples: the list is read once, so skip ORM hydration and identity tracking.
+    # The sort key rides along after the requested fields so a cursor can always be built.
+    sort_key, key_descending, nullable = _sort_key(sort_by, descending)
+    columns = [Task.__table__.c[field] for field in fields]
+    columns.append(sort_key.label('sort_key'))
+    tasks_query = db.select(*columns)
+    if by_relevance:
+        tasks_query = tasks_query.select_from(
+            Task.__table__.join(task_fts, task_fts.c.rowid == Task.__table__.c.id)
+        )
+    tasks_query = tasks_query.filter(*filters)
+
+    if key_descending:
+        tasks_query = tasks_query.order_by(sort_key.desc(), Task.id.desc())
+    else:
+        tasks_query = tasks_query.order_by(sort_key.asc(), Task.id.asc())
+
+    # Keyset pagination is opt-in so the frontend keeps getting a plain list
+    paginate = limit_str is not None or cursor_str is not None
+    if paginate:
         try:
-            due_date_before = datetime.strptime(due_date_before_str, '%Y-%m-%d').date()
-            tasks_query = tasks_query.filter(Task.due_date <= due_date_before)
+            limit = int(limit_str) if limit_str is not None else DEFAULT_PAGE_SIZE
         except ValueError:
-            return jsonify({"error": "Invalid due_date_before format. Use YYYY-MM-DD"}), 400
+            return jsonify({"error": "Invalid limit format. Must be an integer."}), 400
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
 
-    if label_filter:
-        tasks_query = tasks_query.filter_by(label=label_filter)
-
-    if sort_by:
-        if sort_by == 'priority':
-            if order == 'desc':
-                tasks_query = tasks_query.order_by(
-                    db.case(
-                        (Task.priority == 'High', 1),
-                        (Task.priority == 'Medium', 2),
-                        (Task.priority == 'Low', 3),
-                        else_=4
-                    ).asc()
-                )
-            else:
-                tasks_query = tasks_query.order_by(
-                    db.case(
-                        (Task.priority == 'Low', 1),
-                        (Task.priority == 'Medium', 2),
-                        (Task.priority == 'High', 3),
-                        else_=4
-                    ).asc()
-                )
-        elif sort_by == 'due_date':
-            if order == 'desc':
-                tasks_query = tasks_query.order_by(Task.due_date.desc())
-            else:
-                tasks_query = tasks_query.order_by(Task.due_date.asc())
-        elif sort_by == 'created_at':
-            if order == 'desc':
-                tasks_query = tasks_query.order_by(Task.created_at.desc())
-            else:
-                tasks_query = tasks_query.order_by(Task.created_at.asc())
-        else:
-            tasks_query = tasks_query.order_by(Task.created_at.desc())
-    else:
-        tasks_query = tasks_query.order_by(Task.created_at.desc())
-
-    tasks = tasks_query.all()
-    tasks_data = []
-    for task in tasks:
-        tasks_data.append({
-            "id": task.id,
-            "title": task.title,
-            "notes": task.notes,
-            "due_date": task.due_date.isoformat() if task.due_date else None,
-            "priority": task.priority,
-            "label": task.label,
-            "is_done": task.is_done,
-            "created_at": task.created_at.isoformat()
-        })
+        if cursor_str:
+            try:
+                key_value, last_id = _decode_cursor(cursor_str, sort_by, descending)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            tasks_query = tasks_query.filter(
+                _after_cursor(sort_key, key_descending, nullable, key_value, last_id)
+            )
+        # Fetch one extra row to know whether another page exists
+        tasks_query = tasks_query.limit(limit + 1)
+
+    # A page is already bounded by limit, so streaming only applies to the full list
+    if not paginate and request.args.get('stream', '').lower() in ('1', 'true'):
+        return Response(
+            stream_with_context(_stream_tasks_json(tasks_query, fields)),
+            mimetype='application/json'
+        )
+
+    tasks = db.session.execute(tasks_query).all()
+    next_cursor = None
+    if paginate and len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = _encode_cursor(tasks[-1], sort_by, descending)
+
+    tasks_data = [_task_to_dict(task, fields) for task in tasks]
+    if paginate:
+        return jsonify({"data": tasks_data, "next_cursor": next_cursor}), 200
     return jsonify(tasks_data), 200
 
+def _stream_tasks_json(tasks_query, fields):
+    """Yield the task list as a JSON array, pulling STREAM_CHUNK_SIZE rows at a time."""
+    result = db.session.execute(tasks_query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+    dumps = app.json.dumps
+    separator = '['
+    # One chunk per batch: a write per row costs more than building the row's JSON
+    for rows in result.partitions():
+        yield separator + ','.join([dumps(_task_to_dict(row, fields)) for row in rows])
+        separator = ','
+    # An empty result never wrote the opening bracket
+    yield ']' if separator == ',' else '[]'
+
+@app.route('/api/tasks/<int:task_id>', methods=['GET'])
+def get_task(task_id):
+    row = db.session.execute(db.select(*TASK_COLUMNS).filter(Task.id == task_id)).first()
+    if row is None:
+        return jsonify({"error": "Task not found"}), 404
+    return jsonify(_task_to_dict(row)), 200
+
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
     task = db.session.get(Task, task_id) # Using db.session.get for primary key lookup
@@ -178,47 +945,64 @@ def update_task(task_id):
         return jsonify({"error": "Task not found"}), 404
     
     data = request.get_json()
+    changes, error = _task_changes(data)
+    if error:
+        return jsonify({"error": error}), 400
+    for field, value in changes.items():
+        setattr(task, field, value)
+
+    version = _bump_data_version()
+    task.change_version = version
+    db.session.commit()
+    _invalidate_task_caches()
+
+    task_data = _task_to_dict(_task_values(task))
+    _publish_task_event('updated', {"task": task_data}, version)
+    return jsonify(task_data), 200
+
+def _task_changes(data):
+    """Validate an update payload, returning (column changes, None) or (None, error message)."""
+    if not isinstance(data, dict):
+        return None, "Task changes must be a JSON object"
+    changes = {}
+
+    error = _text_fields_error(data)
+    if error:
+        return None, error
 
     if 'title' in data:
         title = data.get('title')
-        if not title or not title.strip():
-            return jsonify({"error": "Title cannot be empty"}), 400
-        task.title = title
+        if not isinstance(title, str) or not title.strip():
+            return None, "Title cannot be empty"
+        changes['title'] = title
 
     if 'notes' in data:
-        task.notes = data.get('notes')
+        changes['notes'] = data.get('notes')
 
     if 'priority' in data:
-        task.priority = data.get('priority')
+        priority = data.get('priority')
+        if priority not in VALID_PRIORITIES:
+            return None, INVALID_PRIORITY_ERROR
+        changes['priority'] = priority
+        changes['priority_rank'] = PRIORITY_RANKS[priority]
 
     if 'label' in data:
-        task.label = data.get('label')
-    
+        changes['label'] = data.get('label')
+
     if 'is_done' in data:
-        task.is_done = bool(data.get('is_done'))
+        changes['is_done'] = bool(data.get('is_done'))
 
     if 'due_date' in data:
         due_date_str = data.get('due_date')
         if due_date_str:
             try:
-                task.due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-            except ValueError:
-                return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+                changes['due_date'] = datetime.strptime(due_date_str, '%Y-%m-%d').date()
+            except (ValueError, TypeError):
+                return None, "Invalid date format. Use YYYY-MM-DD"
         else:
-            task.due_date = None
+            changes['due_date'] = None
 
-    db.session.commit()
-
-    return jsonify({
-        "id": task.id,
-        "title": task.title,
-        "notes": task.notes,
-        "due_date": task.due_date.isoformat() if task.due_date else None,
-        "priority": task.priority,
-        "label": task.label,
-        "is_done": task.is_done,
-        "created_at": task.created_at.isoformat()
-    }), 200
+    return changes, None
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
@@ -226,10 +1010,233 @@ def delete_task(task_id):
     if task is None:
         return jsonify({"error": "Task not found"}), 404
     
+    version = _bump_data_version()
+    _record_tombstones(db.select(Task.id).where(Task.id == task_id), version)
     db.session.delete(task)
     db.session.commit()
+    _invalidate_task_caches()
+    _publish_task_event('deleted', {"id": task_id}, version)
     return '', 204 # 204 No Content
 
+@app.route('/api/tasks/bulk', methods=['PUT'])
+def update_tasks_bulk():
+    """
+    Apply the same changes to every task selected by {"ids": [...]} or
+    {"filter": {...get_tasks filters...}} with one UPDATE per id chunk,
+    e.g. {"ids": [1, 2], "changes": {"is_done": true}}.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    changes, error = _task_changes(data.get('changes'))
+    if error:
+        return jsonify({"error": error}), 400
+    if not changes:
+        return jsonify({"error": "No changes given"}), 400
+
+    table = Task.__table__
+    try:
+        updated = _execute_bulk(data, 'bulk_updated', lambda where, version: table.update().where(*where).values(
+            **changes, change_version=version
+        ))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"data": {"updated": updated}}), 200
+
+@app.route('/api/tasks/bulk', methods=['DELETE'])
+def delete_tasks_bulk():
+    """Delete every task selected by {"ids": [...]} or {"filter": {...}} in set-based statements."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+
+    def delete_with_tombstones(where, version):
+        _record_tombstones(db.select(Task.id).where(*where), version)
+        return Task.__table__.delete().where(*where)
+
+    try:
+        deleted = _execute_bulk(data, 'bulk_deleted', delete_with_tombstones)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"data": {"deleted": deleted}}), 200
+
+def _execute_bulk(data, event, build_statement):
+    """
+    Run build_statement(where_clauses, version) for the selection in `data` inside
+    one transaction, publish `event` and return the number of affected rows.
+    Raises ValueError when the selection is missing or invalid.
+    """
+    ids = data.get('ids')
+    task_filter = data.get('filter')
+    if ids is not None:
+        if task_filter is not None:
+            raise ValueError("Use either ids or filter, not both")
+        if not isinstance(ids, list) or not ids or not all(type(i) is int for i in ids):
+            raise ValueError("ids must be a non-empty list of integers")
+        # Stay well under SQLite's bound-parameter limit
+        selections = [[Task.id.in_(ids[i:i + BULK_CHUNK_SIZE])] for i in range(0, len(ids), BULK_CHUNK_SIZE)]
+    elif isinstance(task_filter, dict):
+        where = _task_filters(task_filter)
+        # An empty or unrecognised filter must never turn into "every task"
+        if not where:
+            raise ValueError("filter must contain priority, label, due_date_before, due_date_within_days or q")
+        selections = [where]
+    else:
+        raise ValueError("A non-empty ids list or filter is required")
+
+    version = _bump_data_version()
+    affected = sum(db.session.execute(build_statement(where, version)).rowcount for where in selections)
+    if affected:
+        db.session.commit()
+        _invalidate_task_caches()
+        _publish_task_event(event, {"count": affected}, version)
+    else:
+        db.session.rollback()
+    return affected
+
+@app.route('/api/tasks/changes', methods=['GET'])
+def get_task_changes():
+    """
+    Delta sync. Without `since` every task is returned; with `since=<token>` only
+    tasks written and ids deleted after that token. Replicas apply `deleted`
+    before `changes` (ids can be reused) and keep `token` for the next call.
+    A token older than TOMBSTONE_RETENTION_VERSIONS gets 410, as its deletions
+    may be forgotten.
+    """
+    since_str = request.args.get('since')
+    since = None
+    if since_str is not None:
+        try:
+            since = int(since_str)
+        except ValueError:
+            since = -1
+        if since < 0:
+            return jsonify({"error": "Invalid since token"}), 400
+
+    # Read the token first: anything committed after it is sent again next time,
+    # which is harmless, whereas reading it last could skip a write
+    token = _current_data_version()
+    if since is not None and since > token:
+        return jsonify({"error": "Sync token is not valid for this database, resync without since"}), 410
+    if since is not None and since < _tombstone_horizon(token):
+        return jsonify({"error": "Sync token is too old, resync without since"}), 410
+
+    changes_query = db.select(*TASK_COLUMNS).order_by(Task.change_version, Task.id)
+    deleted = []
+    if since is not None:
+        changes_query = changes_query.where(Task.change_version > since)
+        deleted = db.session.execute(
+            db.select(TaskTombstone.task_id).where(TaskTombstone.change_version > since)
+            .order_by(TaskTombstone.task_id)
+        ).scalars().all()
+
+    return jsonify({
+        "changes": [_task_to_dict(row) for row in db.session.execute(changes_query)],
+        "deleted": deleted,
+        "token": str(token),
+    }), 200
+
+@app.route('/api/tasks/events', methods=['GET'])
+def get_task_events():
+    """
+    Server-Sent Events stream of task writes made by this process: created/updated
+    (with the task), deleted (with its id) and bulk_* (with a count). Every event
+    carries a /api/tasks/changes token. Writes by other worker processes show up,
+    by the next heartbeat at the latest, as a `changed` event with only the token.
+    Reconnecting with Last-Event-ID replays missed events; a `reset` event means
+    they are gone and the client must resync.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    stream = task_events.stream(last_event_id, heartbeat=app.config['TASK_EVENTS_HEARTBEAT'],
+                                version=_stream_data_version)
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no',
+    })
+
+@app.route('/api/tasks/stats', methods=['GET'])
+def get_task_stats():
+    """Aggregate counts for the tasks matching the get_tasks filters."""
+    try:
+        filters = _task_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Keyed on the data version like the list cache; overdue also depends on the day
+    cache_key = f"{_list_etag(request.args)}:{date.today().isoformat()}"
+    stats = task_stats_cache.get(cache_key)
+    if stats is None:
+        stats = _compute_task_stats(filters)
+        task_stats_cache.set(cache_key, stats, ttl=min(task_stats_cache.ttl, _seconds_until_midnight()))
+    return jsonify(stats), 200
+
+def _compute_task_stats(filters):
+    today = date.today()
+    total, done, overdue = db.session.execute(
+        db.select(
+            db.func.count(),
+            db.func.coalesce(db.func.sum(db.case((Task.is_done, 1), else_=0)), 0),
+            db.func.coalesce(db.func.sum(db.case(
+                (db.and_(Task.is_done == False, Task.due_date < today), 1), else_=0
+            )), 0),
+        ).select_from(Task).filter(*filters)
+    ).one()
+
+    by_priority = dict.fromkeys(VALID_PRIORITIES, 0)
+    by_priority.update(db.session.execute(
+        db.select(Task.priority, db.func.count()).filter(*filters).group_by(Task.priority)
+    ).all())
+
+    by_label = {}
+    unlabeled = 0
+    for label, count in db.session.execute(
+        db.select(Task.label, db.func.count()).filter(*filters).group_by(Task.label)
+    ):
+        if label:
+            by_label[label] = count
+        else:
+            unlabeled += count
+
+    return {
+        "total": total,
+        "done": done,
+        "open": total - done,
+        "overdue": overdue,
+        "by_priority": by_priority,
+        "by_label": by_label,
+        "unlabeled": unlabeled,
+    }
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        "task_list": task_list_cache.stats(),
+        "task_stats": task_stats_cache.stats(),
+        "task_events": task_events.stats(),
+        "suggestions": suggestion_cache.stats(),
+        "suggestion_breaker": model_breaker.stats(),
+    }), 200
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+def slow_queries():
+    """The slowest normalized statements, by ?sort=max_ms (default), total_ms or count."""
+    sort = request.args.get('sort', 'max_ms')
+    if sort not in ('max_ms', 'total_ms', 'count'):
+        return jsonify({"error": "sort must be one of: max_ms, total_ms, count"}), 400
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    return jsonify({
+        "threshold_ms": app.config['SLOW_QUERY_THRESHOLD_MS'],
+        "statements": slow_query_log.top(max(limit, 0), sort),
+    }), 200
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics_registry.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/api/suggest', methods=['POST'])
 def suggest():
     data = request.get_json()
@@ -241,13 +1248,48 @@ def suggest():
     try:
         suggestions = get_ai_suggestions(title)
         # The ai_service.py already handles fallbacks internally if Gemini API fails
+        suggestions_served.inc('fallback' if suggestions.get('fallback') else 'model')
         return jsonify(suggestions), 200
     except ValueError as e: # Catch ValueErrors from ai_service (e.g., missing API key)
+        suggestions_served.inc('error')
         return jsonify({"error": str(e)}), 500
-    except Exception as e:
+    except Exception:
         # Generic error handling for unexpected issues from ai_service
-        print(f"Error getting AI suggestions: {e}")
+        suggestions_served.inc('error')
+        app.logger.exception("Error getting AI suggestions")
+        return jsonify({"error": "Failed to get AI suggestions due to an internal error."}), 500
+
+# Chunks run SUGGEST_BATCH_CONCURRENCY at a time, each bounded by GEMINI_TIMEOUT,
+# so this caps how long one request can hold a worker
+MAX_SUGGEST_BATCH = 200
+
+def _suggest_batch_titles(data):
+    """Validate a {"titles": [...]} payload, returning (titles, None) or (None, error message)."""
+    titles = data.get('titles') if isinstance(data, dict) else None
+    if not isinstance(titles, list) or not titles:
+        return None, "titles must be a non-empty list"
+    if len(titles) > MAX_SUGGEST_BATCH:
+        return None, f"At most {MAX_SUGGEST_BATCH} titles per request"
+    if not all(isinstance(title, str) and title.strip() for title in titles):
+        return None, "Every title must be a non-empty string"
+    return titles, None
+
+@app.route('/api/suggest/batch', methods=['POST'])
+def suggest_batch():
+    """Suggestions for {"titles": [...]}, returned as {"data": [...]} in the same order."""
+    titles, error = _suggest_batch_titles(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        suggestions = get_ai_suggestions_batch(titles)
+    except Exception:
+        suggestions_served.inc('error', amount=len(titles))
+        app.logger.exception("Error getting AI suggestions")
         return jsonify({"error": "Failed to get AI suggestions due to an internal error."}), 500
+    for suggestion in suggestions:
+        suggestions_served.inc('fallback' if suggestion.get('fallback') else 'model')
+    return jsonify({"data": suggestions}), 200
 
 
 if __name__ == '__main__':
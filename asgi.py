@@ -0,0 +1,268 @@
+"""
+ASGI entry point, e.g. `uvicorn asgi:application`.
+
+POST /api/suggest and POST /api/suggest/batch are served on the event loop
+with the model's async API, so an in-flight suggestion costs a coroutine rather
+than a worker thread, and at most SUGGEST_MAX_CONCURRENCY suggestion requests
+run at once (the rest wait their turn). GET /api/tasks/events is also served on the loop: an open event stream
+would otherwise hold a bridge thread for its whole life. Every other route goes
+to the Flask app through a small WSGI bridge running on a bounded thread pool
+of ASGI_WSGI_THREADS threads.
+"""
+import asyncio
+import contextvars
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from urllib.parse import parse_qs
+
+from ai_service import get_ai_suggestions_async, get_ai_suggestions_batch_async
+from app import app as flask_app
+from app import http_request_duration, http_requests, http_requests_in_flight, suggestions_served, task_events
+from app import _stream_data_version, _suggest_batch_titles
+
+SUGGEST_PATH = '/api/suggest'
+SUGGEST_BATCH_PATH = '/api/suggest/batch'
+EVENTS_PATH = '/api/tasks/events'
+
+
+class WsgiBridge:
+    """
+    Run a WSGI app for ASGI http requests, one pool thread per request at a time.
+
+    The app call, every pull from its body and close() may land on different
+    pool threads, so they all run in one copied contextvars context: Flask keeps
+    its app and request contexts there and stream_with_context pops them at the end.
+    """
+
+    def __init__(self, wsgi_app, executor):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        body = await _read_body(receive)
+        environ = _wsgi_environ(scope, body)
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                  for name, value in headers]
+            return lambda data: None  # the legacy write() callable is not supported
+
+        context = contextvars.copy_context()
+        result = await loop.run_in_executor(self.executor, context.run, self.wsgi_app, environ, start_response)
+        # Streaming responses (the task event stream) may never end, so stop
+        # pulling chunks as soon as the client goes away
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            chunks = iter(result)
+            headers_sent = False
+            while not disconnected.done():
+                chunk = await loop.run_in_executor(self.executor, context.run, next, chunks, None)
+                if not headers_sent:
+                    await send({'type': 'http.response.start', 'status': started['status'],
+                                'headers': started['headers']})
+                    headers_sent = True
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, context.run, result.close)
+
+
+class Application:
+    """ASGI app: the async suggestion route plus the Flask app for everything else."""
+
+    def __init__(self, wsgi_app=flask_app, max_concurrent_suggestions=None, wsgi_threads=None):
+        if max_concurrent_suggestions is None:
+            max_concurrent_suggestions = int(os.getenv('SUGGEST_MAX_CONCURRENCY', '32'))
+        if wsgi_threads is None:
+            wsgi_threads = int(os.getenv('ASGI_WSGI_THREADS', '16'))
+        self.suggest_slots = asyncio.Semaphore(max_concurrent_suggestions)
+        self.executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix='wsgi')
+        self.wsgi = WsgiBridge(wsgi_app, self.executor)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] != 'http':
+            raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+        elif scope['path'] == SUGGEST_PATH and scope['method'] == 'POST':
+            await self._recorded('suggest', self._suggest, receive, send)
+        elif scope['path'] == SUGGEST_BATCH_PATH and scope['method'] == 'POST':
+            await self._recorded('suggest_batch', self._suggest_batch, receive, send)
+        elif scope['path'] == EVENTS_PATH and scope['method'] == 'GET':
+            await self.task_events(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def _recorded(self, endpoint, handler, receive, send):
+        # Recorded under the Flask route's endpoint name so /metrics looks the same either way
+        start_time = time.perf_counter()
+        http_requests_in_flight.inc(endpoint)
+        try:
+            status = await handler(receive, send)
+        finally:
+            http_requests_in_flight.dec(endpoint)
+        http_request_duration.observe(time.perf_counter() - start_time, endpoint, 'POST')
+        http_requests.inc(endpoint, 'POST', str(status))
+
+    async def _suggest(self, receive, send):
+        # Mirrors app.suggest, which keeps serving WSGI deployments
+        try:
+            data = json.loads(await _read_body(receive))
+        except ValueError:
+            data = None
+        title = data.get('title') if isinstance(data, dict) else None
+        if not isinstance(title, str) or not title.strip():
+            return await _send_json(send, 400, {"error": "Title is required for suggestions"})
+
+        try:
+            async with self.suggest_slots:
+                suggestions = await get_ai_suggestions_async(title)
+        except ValueError as e:
+            suggestions_served.inc('error')
+            return await _send_json(send, 500, {"error": str(e)})
+        except Exception:
+            suggestions_served.inc('error')
+            flask_app.logger.exception("Error getting AI suggestions")
+            return await _send_json(send, 500, {"error": "Failed to get AI suggestions due to an internal error."})
+        suggestions_served.inc('fallback' if suggestions.get('fallback') else 'model')
+        return await _send_json(send, 200, suggestions)
+
+    async def _suggest_batch(self, receive, send):
+        # Mirrors app.suggest_batch; the whole batch takes one suggestion slot
+        try:
+            data = json.loads(await _read_body(receive))
+        except ValueError:
+            data = None
+        titles, error = _suggest_batch_titles(data)
+        if error:
+            return await _send_json(send, 400, {"error": error})
+
+        try:
+            async with self.suggest_slots:
+                suggestions = await get_ai_suggestions_batch_async(titles)
+        except Exception:
+            suggestions_served.inc('error', amount=len(titles))
+            flask_app.logger.exception("Error getting AI suggestions")
+            return await _send_json(send, 500, {"error": "Failed to get AI suggestions due to an internal error."})
+        for suggestion in suggestions:
+            suggestions_served.inc('fallback' if suggestion.get('fallback') else 'model')
+        return await _send_json(send, 200, {"data": suggestions})
+
+    async def task_events(self, scope, receive, send):
+        # Mirrors app.get_task_events; metrics are recorded once the stream starts, as Flask does
+        start_time = time.perf_counter()
+        headers = dict(scope.get('headers', []))
+        last_event_id = headers.get(b'last-event-id', b'').decode('latin-1')
+        if not last_event_id:
+            last_event_id = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('last_event_id', [None])[0]
+        stream = task_events.astream(last_event_id, heartbeat=flask_app.config['TASK_EVENTS_HEARTBEAT'],
+                                     version=_stream_data_version)
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        http_request_duration.observe(time.perf_counter() - start_time, 'get_task_events', 'GET')
+        http_requests.inc('get_task_events', 'GET', '200')
+
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            while True:
+                chunk = asyncio.ensure_future(stream.__anext__())
+                await asyncio.wait({chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not chunk.done():
+                    chunk.cancel()
+                    with suppress(asyncio.CancelledError):
+                        await chunk
+                    break
+                await send({'type': 'http.response.body', 'body': chunk.result().encode(), 'more_body': True})
+        finally:
+            disconnected.cancel()
+            await stream.aclose()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def _read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    return bytes(body)
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+    return status
+
+
+def _wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+application = Application()
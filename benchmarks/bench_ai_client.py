@@ -0,0 +1,58 @@
+"""
+Per-call client setup overhead in get_ai_suggestions, before and after the
+shared model holder, with the model call itself stubbed out.
+
+"before" reproduces the old hot path: genai.configure() and a new
+GenerativeModel on every call, then the default API client lookup that
+generate_content does (a new client and gRPC channel after each configure).
+"after" goes through ai_service._get_model(). The suggestion cache is
+bypassed so every call reaches the model.
+
+Usage: python benchmarks/bench_ai_client.py [calls]
+"""
+import os
+import sys
+import timeit
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ['GEMINI_API_KEY'] = 'benchmark-key'
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+import ai_service
+
+
+class StubResponse:
+    text = '{"priority": "Medium", "label": "Work"}'
+
+
+def stub_generate_content(self, prompt):
+    # What the real call does before touching the network
+    genai_client.get_default_generative_client()
+    return StubResponse()
+
+
+def before(title):
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    model = genai.GenerativeModel('gemini-pro')
+    return ai_service._parse_suggestions(model.generate_content(ai_service._build_prompt(title)).text)
+
+
+def after(title):
+    model = ai_service._get_model()
+    return ai_service._parse_suggestions(model.generate_content(ai_service._build_prompt(title)).text)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with patch.object(genai.GenerativeModel, 'generate_content', stub_generate_content):
+        for name, fn in (('before', before), ('after', after)):
+            fn('Warm up')
+            best = min(timeit.repeat(lambda: fn('Weekly report'), number=calls, repeat=5))
+            print(f"{name:>6}: {best / calls * 1e6:8.1f} us/call")
+
+
+if __name__ == '__main__':
+    main()
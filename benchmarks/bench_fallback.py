@@ -0,0 +1,81 @@
+"""
+Rule-based suggestion fallback over a large title corpus.
+
+Times the compiled keyword table (suggestion_rules.py) against the original
+chain of substring checks it replaced, and counts the titles they classify
+differently (mostly substring misfires such as "know" or "display").
+
+Usage: python benchmarks/bench_fallback.py [titles]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import datagen
+from suggestion_rules import KeywordClassifier
+
+FILLER = ('the', 'for', 'with', 'team', 'know', 'display', 'network', 'already', 'new', 'plan',
+          'notes', 'call', 'quarterly', 'project', 'weekend', 'shopping', 'reading', 'bills')
+
+
+def substring_chain(title):
+    """The original _rule_based_fallback, kept here as the reference."""
+    title_lower = title.lower()
+    if "urgent" in title_lower or "now" in title_lower or "critical" in title_lower:
+        return ("High", "Urgent")
+    elif "meeting" in title_lower or "report" in title_lower or "work" in title_lower:
+        return ("Medium", "Work")
+    elif "groceries" in title_lower or "shop" in title_lower or "buy" in title_lower:
+        return ("Low", "Shopping")
+    elif "study" in title_lower or "read" in title_lower or "learn" in title_lower:
+        return ("Medium", "Study")
+    elif "home" in title_lower or "clean" in title_lower or "chores" in title_lower:
+        return ("Low", "Home")
+    elif "health" in title_lower or "doctor" in title_lower or "exercise" in title_lower:
+        return ("Medium", "Health")
+    elif "finance" in title_lower or "bill" in title_lower or "pay" in title_lower:
+        return ("High", "Finance")
+    return ("Low", "Other")
+
+
+def corpus(count, seed=42):
+    rng = random.Random(seed)
+    titles = [row['title'] for row in datagen.generate_tasks(count // 2, seed=seed)]
+    while len(titles) < count:
+        titles.append(' '.join(rng.choice(FILLER) for _ in range(rng.randint(2, 8))).capitalize())
+    rng.shuffle(titles)
+    return titles
+
+
+def best_of(fn, titles, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for title in titles:
+            fn(title)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    titles = corpus(count)
+    classifier = KeywordClassifier()
+
+    for name, fn in (('substring chain', substring_chain), ('compiled table', classifier.classify)):
+        elapsed = best_of(fn, titles)
+        print(f"{name:<16} {elapsed / len(titles) * 1e6:6.2f} us/title  ({elapsed * 1000:.0f} ms for {len(titles)})")
+
+    changed = Counter((substring_chain(title)[1], classifier.classify(title)[1])
+                      for title in titles if substring_chain(title) != classifier.classify(title))
+    print(f"{sum(changed.values())} of {len(titles)} titles classified differently:")
+    for (before, after), n in changed.most_common(10):
+        print(f"  {before:>8} -> {after:<8} {n}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Per-request cost of the metrics hooks (before_request, after_request and
+teardown_request), measured inside a request context so that routing and
+view work are excluded.
+
+Usage: python benchmarks/bench_metrics.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from flask import Response
+
+from app import app, _start_request_metrics, _record_request_metrics, _finish_request_metrics
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    response = Response('ok')
+
+    def hooks():
+        _start_request_metrics()
+        _record_request_metrics(response)
+        _finish_request_metrics(None)
+
+    with app.test_request_context('/api/tasks'):
+        best = min(timeit.repeat(hooks, number=iterations, repeat=5))
+    print(f"metrics hooks: {best / iterations * 1e6:.2f} us/request")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-row serialization cost of the task list, before and after the Core read path.
+
+"before" is the original get_tasks loop: hydrate ORM Task instances with
+Task.query.all(), hand-build each dict and encode with the stdlib JSON provider.
+"after" selects TASK_COLUMNS as plain tuples, serializes with _task_to_dict and
+encodes with jsonify, i.e. app.json (orjson when it is installed). Both encode
+through the provider's response(), the path every endpoint takes.
+
+Usage: python benchmarks/bench_serialization.py [rows] [repeats]
+Set TASKS_JSON_ENCODER=stdlib to measure "after" without orjson.
+"""
+import os
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Never benchmark against the real instance/tasks.db
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from flask import jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from app import app, db, Task, TASK_COLUMNS, _task_to_dict
+
+
+def seed(rows):
+    priorities = ['High', 'Medium', 'Low']
+    labels = ['Work', 'Personal', 'Shopping', None]
+    start = datetime(2025, 1, 1)
+    db.session.execute(Task.__table__.insert(), [
+        {
+            'title': f'Benchmark task {i}',
+            'notes': 'Some notes' if i % 3 else None,
+            'due_date': date(2025, 1, 1) + timedelta(days=i % 90) if i % 5 else None,
+            'priority': priorities[i % 3],
+            'label': labels[i % 4],
+            'is_done': i % 7 == 0,
+            'created_at': start + timedelta(minutes=i),
+        }
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def before(stdlib_json):
+    tasks = Task.query.order_by(Task.created_at.desc()).all()
+    tasks_data = []
+    for task in tasks:
+        tasks_data.append({
+            "id": task.id,
+            "title": task.title,
+            "notes": task.notes,
+            "due_date": task.due_date.isoformat() if task.due_date else None,
+            "priority": task.priority,
+            "label": task.label,
+            "is_done": task.is_done,
+            "created_at": task.created_at.isoformat()
+        })
+    body = stdlib_json.response(tasks_data).get_data()
+    db.session.expunge_all()
+    return body
+
+
+def after():
+    rows = db.session.execute(db.select(*TASK_COLUMNS).order_by(Task.created_at.desc())).all()
+    return jsonify([_task_to_dict(row) for row in rows]).get_data()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    stdlib_json = DefaultJSONProvider(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(rows)
+        for name, fn in (('before', lambda: before(stdlib_json)), ('after', after)):
+            fn()  # warm up
+            best = min(timeit.repeat(fn, number=1, repeat=repeats))
+            print(f"{name:>6}: {best * 1e6 / rows:8.2f} us/row  ({best * 1e3:.1f} ms for {rows} rows)")
+        print(f"JSON encoder: {type(app.json).__name__}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Requests per second of the dev server (`python app.py`, i.e. app.run(debug=True))
+against `flask serve`, on a throwaway SQLite file seeded with tasks.
+
+Each server is started as a subprocess and loaded by client threads that keep
+one HTTP/1.1 connection open each (the dev server closes it after every response).
+A mix of GET /api/tasks?limit=50, GET /api/tasks/<id> and POST /api/tasks
+is sent for a fixed duration.
+
+Usage: python benchmarks/bench_server.py [seconds] [clients] [workers] [threads]
+"""
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SEED_ROWS = 1000
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def load(port, seconds, clients):
+    counts = []
+    errors = []
+    stop_at = time.monotonic() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        done = 0
+        while time.monotonic() < stop_at:
+            roll = rng.random()
+            try:
+                if roll < 0.6:
+                    conn.request('GET', '/api/tasks?limit=50')
+                elif roll < 0.9:
+                    conn.request('GET', f'/api/tasks/{rng.randint(1, SEED_ROWS)}')
+                else:
+                    conn.request('POST', '/api/tasks', body=json.dumps({'title': f'Load {seed}-{done}'}),
+                                 headers={'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    errors.append(response.status)
+                if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                    conn.close()
+                done += 1
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(repr(e))
+                conn.close()
+        counts.append(done)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds, len(errors)
+
+
+def run(name, command, port, env, seconds, clients):
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    try:
+        wait_until_up(port)
+        load(port, 1, clients)  # warm-up round, not counted
+        rps, errors = load(port, seconds, clients)
+        print(f"{name:<40} {rps:>8.0f} req/s  errors: {errors}")
+    finally:
+        # Signal the whole group: the dev server's reloader runs the app in a child
+        os.killpg(server.pid, 15)
+        server.wait(timeout=60)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    threads = int(sys.argv[4]) if len(sys.argv) > 4 else 8
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}", FLASK_APP='app')
+        seed = ("from app import app, db, Task\n"
+                "with app.app_context():\n"
+                "    db.create_all()\n"
+                f"    db.session.execute(Task.__table__.insert(), [{{'title': f'Task {{i}}'}} for i in range({SEED_ROWS})])\n"
+                "    db.session.commit()\n")
+        subprocess.run([sys.executable, '-c', seed], cwd=ROOT, env=env, check=True)
+
+        print(f"{seconds:g}s per server, {clients} keep-alive clients, {os.cpu_count()} CPUs")
+        port = free_port()
+        run('dev server (app.run(debug=True))',
+            [sys.executable, '-c', f"from app import app; app.run(debug=True, port={port})"],
+            port, env, seconds, clients)
+        port = free_port()
+        run(f'flask serve ({workers} workers x {threads} threads)',
+            [sys.executable, '-m', 'flask', 'serve', '--port', str(port), '--workers', str(workers),
+             '--threads', str(threads)],
+            port, env, seconds, clients)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+Endpoint benchmark suite.
+
+Seeds a SQLite database per size with benchmarks/datagen.py and times every
+get_tasks filter and sort combination, plus create, update, delete and the
+rule-based suggestion fallback, through the Flask test client. The list
+result cache is disabled so every call does the database work.
+
+Seeded databases are kept in --data-dir, keyed by size, seed and anchor date,
+and copied before each run, so writes never change the cached data. Each size
+runs in its own subprocess because the app binds its database at import.
+
+Usage:
+    python benchmarks/bench_suite.py --sizes 10k,100k --output results.json
+    python benchmarks/bench_suite.py --sizes 10k --compare baseline.json
+    python benchmarks/bench_suite.py --input results.json --compare baseline.json
+
+With --compare, any scenario whose median is more than --threshold (default
+25%) and --min-delta-ms (default 0.5 ms) slower than the baseline is flagged,
+and the exit status is 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+
+SEED_CHUNK_SIZE = 10000
+
+LIST_FILTERS = {
+    'all': {},
+    'priority': {'priority': 'High'},
+    'label': {'label': 'Work'},
+    'due_before': {'due_date_before': '+14'},
+    'due_within': {'due_date_within_days': '7'},
+    'search': {'q': 'report'},
+    'combined': {'priority': 'High', 'label': 'Work', 'due_date_before': '+14'},
+}
+LIST_SORTS = {
+    'created_desc': {},
+    'created_asc': {'sort_by': 'created_at', 'order': 'asc'},
+    'due_asc': {'sort_by': 'due_date', 'order': 'asc'},
+    'due_desc': {'sort_by': 'due_date', 'order': 'desc'},
+    'priority_desc': {'sort_by': 'priority', 'order': 'desc'},
+    'priority_asc': {'sort_by': 'priority', 'order': 'asc'},
+}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def format_size(size):
+    for suffix, unit in (('m', 1000000), ('k', 1000)):
+        if size >= unit and size % unit == 0:
+            return f"{size // unit}{suffix}"
+    return str(size)
+
+
+def measure(fn, repeat, max_seconds):
+    """Time fn after one warm-up call; stops early after max_seconds (but runs at least 3 times)."""
+    fn()
+    times = []
+    deadline = time.perf_counter() + max_seconds
+    while len(times) < repeat and (len(times) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        'runs': len(times),
+        'min_ms': times[0] * 1000,
+        'median_ms': statistics.median(times) * 1000,
+        'p95_ms': times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+        'mean_ms': statistics.fmean(times) * 1000,
+    }
+
+
+def _expect(response, *statuses):
+    if response.status_code not in statuses:
+        raise RuntimeError(f"Unexpected {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def seed_database(db, Task, size, seed, anchor):
+    db.create_all()
+    insert = Task.__table__.insert()
+    chunk = []
+    for row in datagen.generate_tasks(size, seed=seed, anchor=anchor):
+        chunk.append(row)
+        if len(chunk) >= SEED_CHUNK_SIZE:
+            db.session.execute(insert, chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(insert, chunk)
+    db.session.commit()
+
+
+def list_scenarios(anchor):
+    """(name, query string) for every filter and sort combination, plus paging and the full list."""
+    scenarios = []
+    for filter_name, params in LIST_FILTERS.items():
+        params = {key: (anchor + timedelta(days=int(value))).isoformat() if value.startswith('+') else value
+                  for key, value in params.items()}
+        sorts = dict(LIST_SORTS)
+        if 'q' in params:
+            sorts['relevance'] = {'sort_by': 'relevance'}
+        for sort_name, sort_params in sorts.items():
+            query = {**params, **sort_params, 'limit': '50'}
+            scenarios.append((f"list/{filter_name}/{sort_name}", query))
+    scenarios.append(('list/all/full', {}))
+    return scenarios
+
+
+def run_size(size, seed, anchor, data_dir, repeat, max_seconds, only):
+    """Benchmark one size in this process and return {scenario: timings}."""
+    cached = os.path.join(data_dir, f"tasks-{format_size(size)}-seed{seed}-{anchor.isoformat()}.db")
+    work_dir = tempfile.mkdtemp(prefix='bench-')
+    work = os.path.join(work_dir, 'tasks.db')
+    if os.path.exists(cached):
+        shutil.copyfile(cached, work)
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{work}"
+    os.environ['TASK_LIST_CACHE_SIZE'] = '0'
+    os.environ['GEMINI_API_KEY'] = ''
+    os.environ['SLOW_QUERY_THRESHOLD_MS'] = '1e12'
+    sys.path.insert(0, ROOT)
+    from app import app, db, Task
+
+    results = {}
+    try:
+        with app.app_context():
+            if not os.path.exists(cached):
+                start = time.perf_counter()
+                seed_database(db, Task, size, seed, anchor)
+                db.session.remove()
+                db.engine.dispose()
+                # Fold the WAL into the main file before caching it
+                with sqlite3.connect(work) as conn:
+                    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                os.makedirs(data_dir, exist_ok=True)
+                shutil.copyfile(work, cached + '.tmp')
+                os.replace(cached + '.tmp', cached)
+                print(f"Seeded {size} tasks in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+            client = app.test_client()
+            rng = random.Random(seed)
+
+            def timed(name, fn):
+                if only and only not in name:
+                    return
+                results[name] = measure(fn, repeat, max_seconds)
+                print(f"  {format_size(size):>5} {name:<40} {results[name]['median_ms']:9.2f} ms", file=sys.stderr)
+
+            for name, query in list_scenarios(anchor):
+                timed(name, lambda query=query: _expect(client.get('/api/tasks', query_string=query), 200))
+
+            first_page = client.get('/api/tasks', query_string={'limit': '50'}).get_json()
+            timed('list/all/next_page', lambda: _expect(client.get(
+                '/api/tasks', query_string={'limit': '50', 'cursor': first_page['next_cursor']}), 200))
+
+            timed('get', lambda: _expect(client.get(f"/api/tasks/{rng.randint(1, size)}"), 200))
+            timed('create', lambda: _expect(client.post('/api/tasks', json=datagen.new_task_payload(rng, anchor)), 201))
+            timed('update', lambda: _expect(client.put(
+                f"/api/tasks/{rng.randint(1, size)}", json={'is_done': rng.random() < 0.5}), 200))
+
+            # Delete tasks created for the purpose, so every call removes an existing row
+            max_id = db.session.execute(db.select(db.func.max(Task.id))).scalar()
+            _expect(client.post('/api/tasks/bulk', json=[datagen.new_task_payload(rng, anchor)
+                                                         for _ in range(repeat + 1)]), 201)
+            doomed = iter(range(max_id + 1, max_id + repeat + 2))
+            timed('delete', lambda: _expect(client.delete(f"/api/tasks/{next(doomed)}"), 204))
+
+            titles = ['Buy groceries', 'Weekly report', 'Pay rent', 'Call the dentist', 'Something else']
+            with contextlib.redirect_stdout(io.StringIO()):  # the fallback prints a notice per call
+                timed('suggest/fallback', lambda: _expect(client.post(
+                    '/api/suggest', json={'title': rng.choice(titles)}), 200))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Return (rows, regressions) for scenarios present in both result sets."""
+    rows = []
+    regressions = []
+    for key in sorted(set(results) & set(baseline)):
+        current = results[key]['median_ms']
+        before = baseline[key]['median_ms']
+        change = (current - before) / before if before else 0.0
+        regressed = change > threshold and current - before > min_delta_ms
+        rows.append((key, before, current, change, regressed))
+        if regressed:
+            regressions.append(key)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='10k', help='Comma-separated task counts, e.g. 10k,100k,1m')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--anchor', default=date.today().isoformat(), help='Date due dates cluster around')
+    parser.add_argument('--repeat', type=int, default=30, help='Timed runs per scenario')
+    parser.add_argument('--max-seconds', type=float, default=5.0, help='Time budget per scenario')
+    parser.add_argument('--only', help='Only run scenarios whose name contains this')
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'benchmarks', '.data'))
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--input', help='Load results from this file instead of running')
+    parser.add_argument('--compare', help='Baseline results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--min-delta-ms', type=float, default=0.5)
+    parser.add_argument('--run-size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--run-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    anchor = date.fromisoformat(args.anchor)
+
+    if args.run_size:
+        results = run_size(args.run_size, args.seed, anchor, args.data_dir, args.repeat, args.max_seconds, args.only)
+        with open(args.run_output, 'w') as f:
+            json.dump(results, f)
+        return 0
+
+    if args.input:
+        with open(args.input) as f:
+            report = json.load(f)
+    else:
+        report = {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'seed': args.seed,
+                'anchor': anchor.isoformat(),
+                'repeat': args.repeat,
+            },
+            'results': {},
+        }
+        for size in (parse_size(s) for s in args.sizes.split(',')):
+            with tempfile.NamedTemporaryFile(suffix='.json') as out:
+                subprocess.run([sys.executable, os.path.abspath(__file__), '--run-size', str(size),
+                                '--run-output', out.name, '--seed', str(args.seed), '--anchor', anchor.isoformat(),
+                                '--repeat', str(args.repeat), '--max-seconds', str(args.max_seconds),
+                                '--data-dir', args.data_dir] + (['--only', args.only] if args.only else []),
+                               cwd=ROOT, check=True)
+                for name, timings in json.load(out).items():
+                    report['results'][f"{format_size(size)}/{name}"] = timings
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if not args.compare:
+        if args.input:
+            for key, timings in sorted(report['results'].items()):
+                print(f"{key:<48} {timings['median_ms']:9.2f} ms")
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(report['results'], baseline['results'], args.threshold, args.min_delta_ms)
+    print(f"{'scenario':<48} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, before, current, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{key:<48} {before:8.2f}ms {current:8.2f}ms {change:+7.0%}{flag}")
+    print(f"{len(regressions)} regression(s) out of {len(rows)} compared scenarios")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
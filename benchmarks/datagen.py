@@ -0,0 +1,71 @@
+"""
+Deterministic task generator for benchmarks.
+
+The same (count, seed, anchor) always yields the same rows. Distributions are
+loosely modelled on real task lists:
+- most tasks are Medium priority
+- Work dominates the labels and a few tasks have none
+- due dates cluster around `anchor` (usually today), with a tail of overdue tasks
+- overdue and old tasks are more often done
+"""
+import random
+from datetime import date, datetime, timedelta
+
+PRIORITIES = (('High', 20), ('Medium', 50), ('Low', 30))
+LABELS = (('Work', 35), ('Personal', 15), ('Shopping', 10), ('Study', 10), ('Home', 10),
+          ('Health', 6), ('Finance', 6), (None, 8))
+PRIORITY_RANKS = {'Low': 1, 'Medium': 2, 'High': 3}
+
+VERBS = ('Buy', 'Write', 'Review', 'Call', 'Clean', 'Pay', 'Study', 'Plan', 'Fix', 'Prepare',
+         'Book', 'Email', 'Finish', 'Update', 'Schedule', 'Read')
+OBJECTS = ('groceries', 'report', 'invoice', 'dentist appointment', 'kitchen', 'slides', 'budget',
+           'car service', 'presentation', 'flight', 'client proposal', 'chapter 3', 'rent',
+           'gym plan', 'team meeting notes', 'tax return', 'birthday gift', 'backlog')
+NOTES = ('Remember to check with the team first.', 'Bring the receipts.', 'See the shared folder.',
+         'Low effort, do it between meetings.', 'Blocked until the contract is signed.')
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def generate_tasks(count, seed=42, anchor=None):
+    """Yield `count` task rows as dicts of Task column values."""
+    rng = random.Random(seed)
+    anchor = anchor or date.today()
+    # created_at grows with the id, like a real insert history
+    created_start = datetime.combine(anchor, datetime.min.time()) - timedelta(days=365)
+    step = timedelta(days=365) / max(count, 1)
+    for i in range(count):
+        priority = _weighted(rng, PRIORITIES)
+        due_date = None
+        if rng.random() < 0.7:
+            due_date = anchor + timedelta(days=round(rng.gauss(10, 25)))
+        overdue = due_date is not None and due_date < anchor
+        created_at = created_start + step * i
+        title = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+        if rng.random() < 0.3:
+            title += f" #{rng.randint(1, 500)}"
+        yield {
+            'title': title,
+            'notes': rng.choice(NOTES) if rng.random() < 0.4 else None,
+            'due_date': due_date,
+            'priority': priority,
+            'priority_rank': PRIORITY_RANKS[priority],
+            'label': _weighted(rng, LABELS),
+            'is_done': rng.random() < (0.6 if overdue else 0.15),
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+
+
+def new_task_payload(rng, anchor=None):
+    """A JSON body for POST /api/tasks."""
+    anchor = anchor or date.today()
+    return {
+        'title': f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}",
+        'priority': _weighted(rng, PRIORITIES),
+        'label': _weighted(rng, LABELS),
+        'due_date': (anchor + timedelta(days=rng.randint(0, 30))).isoformat(),
+    }
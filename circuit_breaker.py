@@ -0,0 +1,106 @@
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker around calls to a flaky dependency.
+
+    Closed: calls go through. After `failure_threshold` consecutive failures the
+    circuit opens and allow() refuses calls for `reset_timeout` seconds. Then it
+    is half-open: up to `half_open_max_calls` trial calls go through, the first
+    success closes the circuit and any failure opens it again for another
+    `reset_timeout`. A trial that never reports back frees its slot after
+    `reset_timeout`, so a lost caller cannot keep the circuit half-open forever.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trials_started_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def _advance(self):
+        # Called with _lock held
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trials = 0
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self.opened += 1
+
+    def allow(self):
+        """Whether a call may go ahead now; every allowed call must report record_success, record_failure or release."""
+        with self._lock:
+            self._advance()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                now = self._clock()
+                if self._trials >= self.half_open_max_calls and now - self._trials_started_at >= self.reset_timeout:
+                    self._trials = 0
+                if self._trials < self.half_open_max_calls:
+                    if self._trials == 0:
+                        self._trials_started_at = now
+                    self._trials += 1
+                    return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trials = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._open()
+
+    def release(self):
+        """Report an allowed call that ended without telling anything about the dependency, e.g. cancelled."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials:
+                self._trials -= 1
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trials = 0
+
+    def stats(self):
+        with self._lock:
+            self._advance()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
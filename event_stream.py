@@ -0,0 +1,190 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+
+def format_sse(event, data, event_id=None):
+    """Format one Server-Sent Events message; `data` must already be a single-line string."""
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event}\ndata: {data}\n\n"
+
+
+class EventBroker:
+    """
+    In-process fan-out of Server-Sent Events with a bounded replay buffer.
+
+    Every published message is formatted once and kept in a ring buffer of the
+    last `maxlen` messages, so a client reconnecting with Last-Event-ID gets
+    what it missed. Ids are "<epoch>-<seq>": the epoch changes on every process
+    start, so an id from before a restart (or from an evicted stretch of the
+    buffer) is detected and answered with a `reset` event instead of a silent gap.
+
+    Events may carry an integer sync token. Subscribers given a `version`
+    callable returning the current token, which other processes advance too,
+    check it on every wake-up and heartbeat and send a `changed` event with the
+    new token when it is past the last one they sent, since writes made by other
+    processes are never published here.
+    """
+
+    def __init__(self, maxlen=1000, clock=time.time_ns):
+        self.maxlen = maxlen
+        self._epoch = format(clock(), 'x')
+        self._seq = 0
+        self._buffer = deque(maxlen=maxlen)  # (seq, message), oldest first
+        self._token = 0  # sync token of the newest published event
+        self._changed = threading.Condition()
+        # (loop, asyncio.Event) per astream() subscriber, woken from publishing threads
+        self._async_waiters = set()
+        self.published = 0
+        self.resets = 0
+        self.catch_ups = 0
+        self.subscribers = 0
+
+    @property
+    def last_event_id(self):
+        return f"{self._epoch}-{self._seq}"
+
+    def publish(self, event, data, token=None):
+        """Append an event to the buffer, wake subscribers and return its id."""
+        with self._changed:
+            self._seq += 1
+            if token is not None:
+                self._token = max(self._token, token)
+            event_id = f"{self._epoch}-{self._seq}"
+            self._buffer.append((self._seq, format_sse(event, data, event_id)))
+            self.published += 1
+            self._changed.notify_all()
+            for loop, wakeup in self._async_waiters:
+                try:
+                    loop.call_soon_threadsafe(wakeup.set)
+                except RuntimeError:
+                    pass  # the loop is closed; its subscriber is going away
+        return event_id
+
+    def _resume_seq(self, last_event_id):
+        """Sequence number to resume after, or None if the id cannot be resumed."""
+        epoch, _, seq = (last_event_id or '').partition('-')
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        return seq if seq <= self._seq else None
+
+    def _messages_after(self, seq):
+        """Buffered messages newer than seq, or None if some have already been evicted."""
+        if seq == self._seq:
+            return []
+        oldest = self._buffer[0][0] if self._buffer else self._seq + 1
+        if seq < oldest - 1:
+            return None
+        return [message for _, message in itertools.islice(self._buffer, seq - oldest + 1, None)]
+
+    def _reset(self):
+        self.resets += 1
+        return format_sse('reset', '{}', self.last_event_id)
+
+    def _subscribe(self, last_event_id):
+        """(cursor, first messages) for a new subscriber; called with _changed held."""
+        self.subscribers += 1
+        pending = []
+        if last_event_id:
+            resume = self._resume_seq(last_event_id)
+            pending = self._messages_after(resume) if resume is not None else None
+            if pending is None:
+                pending = [self._reset()]
+        return self._seq, pending
+
+    def _take(self, cursor):
+        """(new cursor, messages since cursor); called with _changed held."""
+        pending = self._messages_after(cursor)
+        if pending is None:
+            # This client fell further behind than the buffer holds
+            pending = [self._reset()]
+        return self._seq, pending
+
+    def _catch_up(self, sent, current):
+        """(newest token sent, messages) for a subscriber whose events carried tokens up to `sent`."""
+        if current <= sent:
+            return sent, []
+        with self._changed:
+            self.catch_ups += 1
+        return current, [format_sse('changed', json.dumps({"token": str(current)}))]
+
+    def stream(self, last_event_id=None, heartbeat=15.0, retry_ms=3000, version=None):
+        """
+        Yield SSE text for one subscriber, forever.
+
+        Without last_event_id only new events are sent. A comment line is sent
+        whenever `heartbeat` seconds pass without events, which keeps proxies
+        from closing the connection and lets the server notice dead clients.
+        """
+        with self._changed:
+            cursor, pending = self._subscribe(last_event_id)
+        try:
+            sent = version() if version else None
+            yield f"retry: {retry_ms}\n\n" + ''.join(pending)
+            while True:
+                with self._changed:
+                    if self._seq == cursor:
+                        self._changed.wait(heartbeat)
+                    cursor, pending = self._take(cursor)
+                    # pending always ends with the newest event
+                    newest = self._token if pending else 0
+                if version:
+                    sent, changed = self._catch_up(max(sent, newest), version())
+                    pending += changed
+                yield ''.join(pending) if pending else ": heartbeat\n\n"
+        finally:
+            with self._changed:
+                self.subscribers -= 1
+
+    async def astream(self, last_event_id=None, heartbeat=15.0, retry_ms=3000, version=None):
+        """
+        Same as stream(), as an async generator: a waiting subscriber costs a
+        coroutine on the running loop instead of a blocked thread. `version` is
+        called in a worker thread, as it usually queries the database.
+        """
+        wakeup = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), wakeup)
+        with self._changed:
+            cursor, pending = self._subscribe(last_event_id)
+            self._async_waiters.add(waiter)
+        try:
+            sent = await asyncio.to_thread(version) if version else None
+            yield f"retry: {retry_ms}\n\n" + ''.join(pending)
+            while True:
+                with self._changed:
+                    # Cleared under the lock: a publish after this check sets it again
+                    idle = self._seq == cursor
+                    if idle:
+                        wakeup.clear()
+                if idle:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), heartbeat)
+                    except asyncio.TimeoutError:
+                        pass
+                with self._changed:
+                    cursor, pending = self._take(cursor)
+                    newest = self._token if pending else 0
+                if version:
+                    sent, changed = self._catch_up(max(sent, newest), await asyncio.to_thread(version))
+                    pending += changed
+                yield ''.join(pending) if pending else ": heartbeat\n\n"
+        finally:
+            with self._changed:
+                self._async_waiters.discard(waiter)
+                self.subscribers -= 1
+
+    def stats(self):
+        with self._changed:
+            return {
+                "last_event_id": self.last_event_id,
+                "buffered": len(self._buffer),
+                "maxlen": self.maxlen,
+                "published": self.published,
+                "resets": self.resets,
+                "catch_ups": self.catch_ups,
+                "subscribers": self.subscribers,
+            }
@@ -0,0 +1,143 @@
+"""
+Pre-forking WSGI server built on werkzeug and the standard library.
+
+The master process binds the listening socket, runs a warm-up hook and forks
+`workers` processes. Each worker serves the shared socket with a pool of
+`threads` request threads. Workers that die are replaced. SIGTERM or SIGINT
+stops accepting, lets in-flight requests finish for up to `graceful_timeout`
+seconds and then kills whatever is left.
+"""
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    # Idle keep-alive connections give their pool thread back after this many seconds
+    timeout = 5
+
+    def log_request(self, code='-', size='-'):
+        # Access logs are left to the reverse proxy; errors are still logged
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Serve an already-listening socket with a bounded pool of request threads."""
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, host, port, app, fd, threads, handler=KeepAliveRequestHandler):
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+        super().__init__(host, port, app, handler=handler, fd=fd)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def finish_in_flight(self):
+        # Wait for in-flight requests; the master enforces the graceful timeout
+        self._pool.shutdown(wait=True)
+
+
+class PreforkServer:
+    def __init__(self, app, host='127.0.0.1', port=8000, workers=2, threads=8,
+                 graceful_timeout=30.0, warm_up=None, post_fork=None, backlog=1024):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.warm_up = warm_up
+        self.post_fork = post_fork
+        self.backlog = backlog
+        self._pids = {}  # pid -> start time
+        self._stop_deadline = None
+
+    def log(self, message):
+        print(f"[{os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+    def run(self):
+        # Warm up before binding so no connection waits on imports or a broken database
+        if self.warm_up is not None:
+            self.warm_up()
+        listener = socket.create_server((self.host, self.port), backlog=self.backlog)
+        self.port = listener.getsockname()[1]
+        self.log(f"Listening on http://{self.host}:{self.port} with {self.workers} workers x {self.threads} threads")
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        try:
+            for _ in range(self.workers):
+                self._spawn(listener)
+            self._supervise(listener)
+        finally:
+            listener.close()
+        self.log("Shut down")
+
+    def _spawn(self, listener):
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                self._run_worker(listener)
+                status = 0
+            except BaseException as e:
+                self.log(f"Worker failed: {e!r}")
+            finally:
+                os._exit(status)
+        self._pids[pid] = time.monotonic()
+
+    def _run_worker(self, listener):
+        # Ctrl-C reaches the whole process group; the master decides when workers stop
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        if self.post_fork is not None:
+            self.post_fork()
+        server = PooledWSGIServer(self.host, self.port, self.app, fd=listener.fileno(), threads=self.threads)
+        listener.close()
+        # shutdown() blocks until serve_forever() returns, so it cannot run in the handler itself
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+        server.serve_forever()
+        server.server_close()
+        server.finish_in_flight()
+
+    def _handle_stop(self, signum, frame):
+        if self._stop_deadline is None:
+            self.log("Stopping workers")
+            self._stop_deadline = time.monotonic() + self.graceful_timeout
+            for pid in self._pids:
+                os.kill(pid, signal.SIGTERM)
+
+    def _supervise(self, listener):
+        while self._pids:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                started = self._pids.pop(pid, None)
+                if self._stop_deadline is None and started is not None:
+                    self.log(f"Worker {pid} exited with status {status}, restarting")
+                    # Back off when workers die right after starting, e.g. a bad configuration
+                    if time.monotonic() - started < 1:
+                        time.sleep(1)
+                    self._spawn(listener)
+                continue
+            if self._stop_deadline is not None and time.monotonic() > self._stop_deadline:
+                self.log(f"Graceful timeout exceeded, killing {len(self._pids)} workers")
+                for pid in self._pids:
+                    os.kill(pid, signal.SIGKILL)
+                self._stop_deadline = float('inf')
+            time.sleep(0.1)
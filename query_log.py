@@ -0,0 +1,130 @@
+"""
+Per-statement timing for SQL executed by the app.
+
+Statements are grouped by a normalized form (whitespace collapsed, literals
+and repeated placeholder lists folded) so that `IN (?, ?)` and `IN (?, ?, ?)`
+count as one statement. The log keeps count, total and maximum duration for
+up to `max_statements` of them, plus the parameters and query plan of the
+slowest run that crossed the threshold.
+"""
+import re
+import threading
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\?(?:, \?)+\)')
+_REPEATED_GROUPS = re.compile(r'(\([^()]*\))(?:, \1)+')
+
+# Raw statements come from SQLAlchemy's compiled cache, so there are few of them
+_NORMALIZE_CACHE_SIZE = 2000
+
+# Slow-query parameters are logged and served by /api/admin/slow-queries, so
+# keep them small: long values are cut and long lists shortened
+MAX_PARAMETER_LENGTH = 100
+MAX_PARAMETERS = 20
+
+
+def normalize_statement(statement):
+    normalized = _WHITESPACE.sub(' ', statement).strip()
+    normalized = _STRING_LITERAL.sub('?', normalized)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST.sub('(?, ...)', normalized)
+    # Multi-row VALUES lists from executemany batching
+    return _REPEATED_GROUPS.sub(r'\1, ...', normalized)
+
+
+def _truncate(value):
+    if isinstance(value, str) and len(value) > MAX_PARAMETER_LENGTH:
+        return f"{value[:MAX_PARAMETER_LENGTH]}... ({len(value)} chars)"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    return value
+
+
+def summarize_parameters(parameters, executemany=False):
+    """
+    A bounded copy of a statement's parameters. For executemany only the row
+    count and the first row are kept.
+    """
+    if executemany:
+        return {"rows": len(parameters), "first": summarize_parameters(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        items = list(parameters.items())
+        summary = {key: _truncate(value) for key, value in items[:MAX_PARAMETERS]}
+        if len(items) > MAX_PARAMETERS:
+            summary["..."] = f"{len(items) - MAX_PARAMETERS} more"
+        return summary
+    summary = [_truncate(value) for value in parameters[:MAX_PARAMETERS]]
+    if len(parameters) > MAX_PARAMETERS:
+        summary.append(f"... ({len(parameters) - MAX_PARAMETERS} more)")
+    return summary
+
+
+def format_query_plan(rows):
+    """Render EXPLAIN QUERY PLAN rows (id, parent, notused, detail) as an indented tree."""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return '\n'.join(lines)
+
+
+class SlowQueryLog:
+    def __init__(self, max_statements=500):
+        self.max_statements = max_statements
+        self._stats = {}  # normalized statement -> stats dict
+        self._normalized = {}
+        self._lock = threading.Lock()
+
+    def _normalize(self, statement):
+        normalized = self._normalized.get(statement)
+        if normalized is None:
+            if len(self._normalized) >= _NORMALIZE_CACHE_SIZE:
+                self._normalized.clear()
+            normalized = self._normalized[statement] = normalize_statement(statement)
+        return normalized
+
+    def record(self, statement, duration, parameters=None, plan=None):
+        """
+        Add one execution. `parameters` and `plan` are only given for slow runs and
+        are kept when the run is the statement's slowest so far.
+        """
+        normalized = self._normalize(statement)
+        with self._lock:
+            stats = self._stats.get(normalized)
+            if stats is None:
+                if len(self._stats) >= self.max_statements and not self._evict_faster_than(duration):
+                    return
+                stats = self._stats[normalized] = {
+                    "statement": normalized, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "slow_count": 0, "slowest_parameters": None, "slowest_plan": None,
+                }
+            duration_ms = duration * 1000
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            if plan is not None:
+                stats["slow_count"] += 1
+            if duration_ms > stats["max_ms"]:
+                stats["max_ms"] = duration_ms
+                if plan is not None:
+                    stats["slowest_parameters"] = parameters
+                    stats["slowest_plan"] = plan
+
+    def _evict_faster_than(self, duration):
+        fastest = min(self._stats.values(), key=lambda stats: stats["max_ms"])
+        if fastest["max_ms"] >= duration * 1000:
+            return False
+        del self._stats[fastest["statement"]]
+        return True
+
+    def top(self, n=10, sort='max_ms'):
+        """The n statements with the highest `sort` value (max_ms, total_ms or count)."""
+        with self._lock:
+            ranked = sorted(self._stats.values(), key=lambda stats: stats[sort], reverse=True)[:n]
+            return [dict(stats, avg_ms=stats["total_ms"] / stats["count"]) for stats in ranked]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,152 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from ttl_cache import TTLCache
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_title(title):
+    """Cache key for a title: case, punctuation and spacing do not change the suggestion."""
+    return _WHITESPACE.sub(' ', _NON_WORD.sub(' ', title.lower())).strip()
+
+
+class SuggestionCache:
+    """
+    Suggestions by normalized title, in two tiers.
+
+    Model answers live in an in-memory LRU and, when `db_path` is given, in a
+    SQLite table that survives restarts and is shared by worker processes.
+    Rule-based fallback answers only go to a separate, short-lived in-memory
+    tier: they spare the model a retry right after it failed, but can never
+    replace or hide a model answer.
+    """
+
+    def __init__(self, maxsize=1024, ttl=7 * 24 * 3600, fallback_ttl=300, db_path=None,
+                 db_max_rows=100000, clock=time.time):
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._fallbacks = TTLCache(maxsize=maxsize, ttl=fallback_ttl)
+        self.ttl = ttl
+        self.db_path = db_path
+        self.db_max_rows = db_max_rows
+        self._clock = clock
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.fallback_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            maxsize=int(os.getenv('SUGGESTION_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('SUGGESTION_CACHE_TTL', str(7 * 24 * 3600))),
+            fallback_ttl=float(os.getenv('SUGGESTION_FALLBACK_TTL', '300')),
+            db_path=os.getenv('SUGGESTION_CACHE_DB') or None,
+            db_max_rows=int(os.getenv('SUGGESTION_CACHE_DB_MAX_ROWS', '100000')),
+        )
+
+    def _connection(self):
+        # Called with _db_lock held
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS suggestion_cache ("
+                "key TEXT PRIMARY KEY, priority TEXT NOT NULL, label TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_suggestion_cache_expires_at ON suggestion_cache (expires_at)")
+        return self._db
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, title):
+        """Return a copy of the cached suggestion for title, or None."""
+        key = normalize_title(title)
+        suggestion = self._memory.get(key)
+        if suggestion is not None:
+            self._count('memory_hits')
+            return dict(suggestion)
+        if self.db_path:
+            with self._db_lock:
+                row = self._connection().execute(
+                    "SELECT priority, label, expires_at FROM suggestion_cache WHERE key = ? AND expires_at > ?",
+                    (key, self._clock()),
+                ).fetchone()
+            if row is not None:
+                suggestion = {"priority": row[0], "label": row[1], "fallback": False}
+                # Keep the persistent expiry rather than restarting the TTL
+                self._memory.set(key, suggestion, ttl=row[2] - self._clock())
+                self._count('db_hits')
+                return dict(suggestion)
+        suggestion = self._fallbacks.get(key)
+        if suggestion is not None:
+            self._count('fallback_hits')
+            return dict(suggestion)
+        self._count('misses')
+        return None
+
+    def set(self, title, suggestion):
+        key = normalize_title(title)
+        if suggestion.get("fallback"):
+            self._fallbacks.set(key, dict(suggestion))
+            return
+        self._fallbacks.delete(key)
+        self._memory.set(key, dict(suggestion))
+        if self.db_path:
+            with self._db_lock:
+                db = self._connection()
+                db.execute(
+                    "INSERT OR REPLACE INTO suggestion_cache (key, priority, label, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, suggestion["priority"], suggestion["label"], self._clock() + self.ttl),
+                )
+                self._writes_since_prune += 1
+                # Pruning scans the table, so only do it every so often
+                if self._writes_since_prune >= max(self.db_max_rows // 100, 1):
+                    self._prune(db)
+
+    def _prune(self, db):
+        self._writes_since_prune = 0
+        db.execute("DELETE FROM suggestion_cache WHERE expires_at <= ?", (self._clock(),))
+        # Over the size limit: drop the entries closest to expiry, i.e. the oldest writes
+        db.execute(
+            "DELETE FROM suggestion_cache WHERE key IN (SELECT key FROM suggestion_cache ORDER BY expires_at "
+            "LIMIT max((SELECT count(*) FROM suggestion_cache) - ?, 0))",
+            (self.db_max_rows,),
+        )
+
+    def clear(self):
+        self._memory.clear()
+        self._fallbacks.clear()
+        if self.db_path:
+            with self._db_lock:
+                self._connection().execute("DELETE FROM suggestion_cache")
+
+    def stats(self):
+        with self._stats_lock:
+            hits = self.memory_hits + self.db_hits
+            lookups = hits + self.fallback_hits + self.misses
+            stats = {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "fallback_hits": self.fallback_hits,
+                "misses": self.misses,
+                # Fallback hits are not counted as hits: they stand in for a failed model call
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+        stats["memory_size"] = len(self._memory)
+        stats["fallback_size"] = len(self._fallbacks)
+        stats["persistent"] = bool(self.db_path)
+        if self.db_path:
+            with self._db_lock:
+                stats["db_size"] = self._connection().execute("SELECT count(*) FROM suggestion_cache").fetchone()[0]
+        return stats
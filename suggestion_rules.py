@@ -0,0 +1,90 @@
+"""
+Keyword rules for the rule-based suggestion fallback.
+
+A rule table is a list of {"priority", "label", "keywords"} entries; the first
+rule with a keyword in the title wins, and titles without any keyword get the
+default. Keywords match whole words, case-insensitively, with an optional
+plural "s"/"es", so "bill" matches "Pay bills" but "now" does not match
+"know" and "pay" does not match "display". Other inflections are listed as
+keywords of their own.
+
+The table is compiled once into a dict from keyword (and its plurals) to rule,
+so classifying a title is one regular expression split into words plus a dict
+lookup per word, however many keywords there are. SUGGESTION_RULES_FILE may
+point to a JSON file that replaces the default table: {"rules": [...], "default": {"priority": ..., "label": ...}}.
+"""
+import json
+import os
+import re
+from itertools import repeat
+
+DEFAULT_RULES = [
+    {"priority": "High", "label": "Urgent", "keywords": ["urgent", "now", "critical"]},
+    {"priority": "Medium", "label": "Work", "keywords": [
+        "meeting", "report", "reporting", "work", "worked", "working"]},
+    {"priority": "Low", "label": "Shopping", "keywords": ["groceries", "shop", "shopping", "buy", "buying"]},
+    {"priority": "Medium", "label": "Study", "keywords": [
+        "study", "studies", "studying", "read", "reading", "learn", "learned", "learning"]},
+    {"priority": "Low", "label": "Home", "keywords": ["home", "clean", "cleaned", "cleaning", "chores"]},
+    {"priority": "Medium", "label": "Health", "keywords": [
+        "health", "healthy", "doctor", "exercise", "exercising", "gym"]},
+    {"priority": "High", "label": "Finance", "keywords": ["finance", "bill", "billing", "pay", "paying", "payment"]},
+]
+DEFAULT_SUGGESTION = {"priority": "Low", "label": "Other"}
+
+_WORD = re.compile(r'\w+')
+
+
+def _inflections(word):
+    return (word, word + 's', word + 'es')
+
+
+class KeywordClassifier:
+    def __init__(self, rules=DEFAULT_RULES, default=DEFAULT_SUGGESTION):
+        self.rules = [(rule["priority"], rule["label"]) for rule in rules]
+        self.default = (default["priority"], default["label"])
+        # Keyword (words joined by single spaces, plural forms included) -> index of its first rule
+        self._keywords = {}
+        self._max_words = 1
+        for index, rule in enumerate(rules):
+            for keyword in rule["keywords"]:
+                words = _WORD.findall(keyword.lower())
+                if not words:
+                    raise ValueError(f"Keyword without any word in suggestion rules: {keyword!r}")
+                self._max_words = max(self._max_words, len(words))
+                for last in _inflections(words[-1]):
+                    self._keywords.setdefault(' '.join(words[:-1] + [last]), index)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            config = json.load(f)
+        rules = config.get("rules")
+        if not isinstance(rules, list):
+            raise ValueError(f"{path}: \"rules\" must be a list")
+        for rule in rules:
+            if not (isinstance(rule, dict) and isinstance(rule.get("priority"), str)
+                    and isinstance(rule.get("label"), str) and isinstance(rule.get("keywords"), list)):
+                raise ValueError(f"{path}: every rule needs a priority, a label and a list of keywords")
+        return cls(rules, config.get("default", DEFAULT_SUGGESTION))
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv('SUGGESTION_RULES_FILE')
+        return cls.from_file(path) if path else cls()
+
+    def classify(self, title):
+        """(priority, label) of the first rule with a keyword in title, or the default."""
+        title = title.lower()
+        words = title.split()
+        # str.split is several times faster than the regex and gives the same
+        # words when there is no punctuation (\w is isalnum() plus "_")
+        if not all(map(str.isalnum, words)):
+            words = _WORD.findall(title)
+        get = self._keywords.get
+        miss = len(self.rules)
+        best = min(map(get, words, repeat(miss, len(words))), default=miss)
+        for n in range(2, self._max_words + 1):
+            for start in range(len(words) - n + 1):
+                best = min(best, get(' '.join(words[start:start + n]), miss))
+        return self.rules[best] if best < miss else self.default
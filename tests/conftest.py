@@ -1,3 +1,5 @@
 import sys
 import os
 sys.path.append(os.path.abspath('.'))
+# Keep the test suite off instance/tasks.db; the engine is bound when app.py is imported
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
@@ -1,8 +1,23 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
 import os
 import json
-from ai_service import get_ai_suggestions, _rule_based_fallback # Import _rule_based_fallback for direct testing
+from ai_service import (
+    get_ai_suggestions, get_ai_suggestions_async, get_ai_suggestions_batch, get_ai_suggestions_batch_async,
+    model_breaker, suggestion_cache, _model_holder, _rule_based_fallback,
+)
+
+# Suggestions, the model client and the breaker state are per process; every test starts cold
+@pytest.fixture(autouse=True)
+def clear_suggestion_cache():
+    suggestion_cache.clear()
+    _model_holder.reset()
+    model_breaker.reset()
+    yield
+    suggestion_cache.clear()
+    _model_holder.reset()
+    model_breaker.reset()
 
 # Mock the os.getenv for GEMINI_API_KEY
 @pytest.fixture(autouse=True)
@@ -52,6 +67,21 @@ def test_get_ai_suggestions_malformed_response_triggers_fallback(mock_genai_mode
     assert suggestions == {"priority": "Medium", "label": "Work", "fallback": True}
     mock_genai_model.return_value.generate_content.assert_called_once()
 
+def test_get_ai_suggestions_async(mock_genai_model):
+    # The async path awaits generate_content_async and falls back the same way
+    mock_response = MagicMock()
+    mock_response.text = json.dumps({"priority": "High", "label": "Work"})
+    generate = mock_genai_model.return_value.generate_content_async = AsyncMock(return_value=mock_response)
+
+    suggestions = asyncio.run(get_ai_suggestions_async("Prepare presentation"))
+    assert suggestions == {"priority": "High", "label": "Work", "fallback": False}
+    generate.assert_awaited_once()
+    mock_genai_model.return_value.generate_content.assert_not_called()
+
+    generate.side_effect = Exception("API connection error")
+    suggestions = asyncio.run(get_ai_suggestions_async("Buy groceries"))
+    assert suggestions == {"priority": "Low", "label": "Shopping", "fallback": True}
+
 @patch.dict(os.environ, {"GEMINI_API_KEY": ""}) # Temporarily unset API key for this test
 def test_get_ai_suggestions_missing_api_key_triggers_fallback():
     # When API key is missing, _rule_based_fallback should be called directly
@@ -100,4 +130,171 @@ def test_rule_based_fallback_finance():
 def test_rule_based_fallback_default():
     title = "Random task without keywords"
     suggestions = _rule_based_fallback(title)
-    assert suggestions == {"priority": "Low", "label": "Other", "fallback": True}
\ No newline at end of file
+    assert suggestions == {"priority": "Low", "label": "Other", "fallback": True}
+
+def test_get_ai_suggestions_is_cached_by_normalized_title(mock_genai_model):
+    mock_response = MagicMock()
+    mock_response.text = json.dumps({"priority": "Medium", "label": "Work"})
+    generate = mock_genai_model.return_value.generate_content
+    generate.return_value = mock_response
+
+    assert get_ai_suggestions("Weekly report") == {"priority": "Medium", "label": "Work", "fallback": False}
+    assert get_ai_suggestions("weekly  report!") == {"priority": "Medium", "label": "Work", "fallback": False}
+    generate.assert_called_once()
+
+def test_fallback_is_cached_separately(mock_genai_model):
+    generate = mock_genai_model.return_value.generate_content
+    generate.side_effect = Exception("API connection error")
+    assert get_ai_suggestions("Buy groceries")["fallback"] is True
+    # The cached fallback spares the failing model a retry for a while...
+    assert get_ai_suggestions("Buy groceries")["fallback"] is True
+    assert generate.call_count == 1
+
+    # ...but a model answer for the title, once there is one, takes precedence
+    suggestion_cache.set("Buy groceries", {"priority": "High", "label": "Shopping", "fallback": False})
+    assert get_ai_suggestions("Buy groceries") == {"priority": "High", "label": "Shopping", "fallback": False}
+
+def test_model_is_built_once_and_rebuilt_on_config_change(mock_genai_model):
+    mock_response = MagicMock()
+    mock_response.text = json.dumps({"priority": "High", "label": "Work"})
+    mock_genai_model.return_value.generate_content.return_value = mock_response
+
+    with patch("google.generativeai.configure") as mock_configure:
+        get_ai_suggestions("First title")
+        get_ai_suggestions("Second title")
+        assert mock_configure.call_count == 1
+        mock_genai_model.assert_called_once_with('gemini-pro')
+
+        with patch.dict(os.environ, {"GEMINI_API_KEY": "rotated_key"}):
+            get_ai_suggestions("Third title")
+        mock_configure.assert_called_with(api_key="rotated_key")
+        with patch.dict(os.environ, {"GEMINI_API_KEY": "rotated_key", "GEMINI_MODEL": "gemini-1.5-flash"}):
+            get_ai_suggestions("Fourth title")
+        mock_genai_model.assert_called_with('gemini-1.5-flash')
+        assert mock_configure.call_count == 3
+
+def test_model_holder_is_thread_safe(mock_genai_model):
+    import threading
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(_model_holder.get())) for _ in range(8)]
+    with patch("google.generativeai.configure"):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert mock_genai_model.call_count == 1
+    assert all(model is models[0] for model in models)
+
+def test_get_ai_suggestions_batch_chunks_and_falls_back_per_item(mock_genai_model):
+    generate = mock_genai_model.return_value.generate_content
+
+    def answer(prompt, **kwargs):
+        # Answer every title except the ones mentioning "mystery", out of order
+        titles = [json.loads(line.split('. ', 1)[1]) for line in prompt.splitlines()
+                  if line.strip()[:1].isdigit()]
+        items = [{"index": i, "priority": "High", "label": "Work"}
+                 for i, title in enumerate(titles) if "mystery" not in title]
+        response = MagicMock()
+        response.text = json.dumps(items[::-1])
+        return response
+
+    generate.side_effect = answer
+    titles = ["Write report", "Buy groceries mystery", "Plan sprint", "write report!", "Call \"Bob\""]
+    with patch("ai_service.BATCH_CHUNK_SIZE", 2):
+        results = get_ai_suggestions_batch(titles)
+
+    work = {"priority": "High", "label": "Work", "fallback": False}
+    assert results == [work, {"priority": "Low", "label": "Shopping", "fallback": True}, work, work, work]
+    # Four distinct titles in chunks of two; the duplicate is asked once
+    assert generate.call_count == 2
+
+    # Answered titles are now cached, only the failed one goes back to the model
+    get_ai_suggestions_batch(["Write report", "Buy groceries mystery", "Something new"])
+    assert generate.call_count == 3
+
+def test_get_ai_suggestions_batch_whole_chunk_failure(mock_genai_model):
+    mock_genai_model.return_value.generate_content.return_value.text = "not json"
+    assert get_ai_suggestions_batch(["Pay bills", "Clean the house"]) == [
+        {"priority": "High", "label": "Finance", "fallback": True},
+        {"priority": "Low", "label": "Home", "fallback": True},
+    ]
+
+@patch.dict(os.environ, {"GEMINI_API_KEY": ""})
+def test_get_ai_suggestions_batch_without_api_key():
+    assert get_ai_suggestions_batch(["Urgent fix"]) == [{"priority": "High", "label": "Urgent", "fallback": True}]
+
+def test_model_call_has_deadline_and_no_retries(mock_genai_model):
+    mock_genai_model.return_value.generate_content.return_value.text = json.dumps({"priority": "High", "label": "Work"})
+    with patch("ai_service.MODEL_TIMEOUT", 2.5):
+        get_ai_suggestions("Write report")
+    _, kwargs = mock_genai_model.return_value.generate_content.call_args
+    assert kwargs["request_options"] == {"retry": None, "timeout": 2.5}
+
+def test_circuit_breaker_skips_model_after_failures(mock_genai_model):
+    generate = mock_genai_model.return_value.generate_content
+    generate.side_effect = Exception("Deadline exceeded")
+    with patch.object(model_breaker, "failure_threshold", 2):
+        get_ai_suggestions("Buy groceries")
+        get_ai_suggestions("Pay bills")
+        assert model_breaker.state == "open"
+        # Open: straight to the rule-based fallback, the model is not called
+        assert get_ai_suggestions("Clean the house") == {"priority": "Low", "label": "Home", "fallback": True}
+        assert generate.call_count == 2
+
+        # After the cool-down one trial call goes through and closes the circuit
+        generate.side_effect = None
+        generate.return_value.text = json.dumps({"priority": "High", "label": "Work"})
+        with patch.object(model_breaker, "reset_timeout", 0):
+            assert get_ai_suggestions("Write report") == {"priority": "High", "label": "Work", "fallback": False}
+        assert model_breaker.state == "closed"
+
+def test_malformed_responses_do_not_open_circuit(mock_genai_model):
+    mock_genai_model.return_value.generate_content.return_value.text = "not json"
+    with patch.object(model_breaker, "failure_threshold", 1):
+        get_ai_suggestions("Buy groceries")
+    assert model_breaker.state == "closed"
+
+def test_get_ai_suggestions_async_timeout_falls_back(mock_genai_model):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    mock_genai_model.return_value.generate_content_async = hang
+    with patch("ai_service.MODEL_TIMEOUT", 0.01):
+        suggestions = asyncio.run(get_ai_suggestions_async("Buy groceries"))
+    assert suggestions == {"priority": "Low", "label": "Shopping", "fallback": True}
+    assert model_breaker.stats()["consecutive_failures"] == 1
+
+def test_get_ai_suggestions_batch_runs_chunks_concurrently(mock_genai_model):
+    import threading
+    import time
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def answer(prompt, **kwargs):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        response = MagicMock()
+        response.text = json.dumps([{"index": 0, "priority": "High", "label": prompt.split('0. "')[1].split('"')[0]}])
+        return response
+
+    mock_genai_model.return_value.generate_content.side_effect = answer
+    titles = [f"Title {i}" for i in range(5)]
+    with patch("ai_service.BATCH_CHUNK_SIZE", 1), patch("ai_service.BATCH_CONCURRENCY", 2):
+        results = get_ai_suggestions_batch(titles)
+    assert [r["label"] for r in results] == titles
+    assert peak == 2
+
+def test_get_ai_suggestions_batch_async(mock_genai_model):
+    generate = mock_genai_model.return_value.generate_content_async = AsyncMock()
+    generate.return_value.text = json.dumps([{"index": 0, "priority": "High", "label": "Work"}])
+    with patch("ai_service.BATCH_CHUNK_SIZE", 1):
+        results = asyncio.run(get_ai_suggestions_batch_async(["Write report", "write report", "Buy milk"]))
+    work = {"priority": "High", "label": "Work", "fallback": False}
+    assert results == [work, work, work]
+    assert generate.await_count == 2
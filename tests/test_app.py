@@ -1,12 +1,15 @@
 import pytest
 from unittest.mock import patch
-from datetime import date, datetime
-from app import app, db, Task
+from datetime import date, datetime, timedelta
+import json
+import threading
+from app import app, db, Task, TASK_FIELDS, task_list_cache, _invalidate_task_caches
 
 @pytest.fixture
 def client():
     app.config['TESTING'] = True
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:' # Use in-memory SQLite for tests
+    _invalidate_task_caches()
     with app.app_context():
         db.create_all()
         yield app.test_client()
@@ -361,4 +364,928 @@ def test_get_tasks_default_sort(client):
         response_no_sort = client.get('/api/tasks') # No sort_by parameter
         assert response_no_sort.status_code == 200
         tasks_no_sort = response_no_sort.get_json()
-        assert tasks_no_sort[0]['title'] == 'Task C' # Default is created_at desc
\ No newline at end of file
+        assert tasks_no_sort[0]['title'] == 'Task C' # Default is created_at desc
+
+# Test keyset pagination across every sort combination
+def test_get_tasks_keyset_pagination(client):
+    with app.app_context():
+        priorities = ['High', 'Medium', 'Low']
+        for i in range(12):
+            db.session.add(Task(
+                title=f"Task {i}",
+                priority=priorities[i % 3],
+                # Every fourth task has no due date to exercise NULL handling
+                due_date=None if i % 4 == 0 else date(2025, 12, 1 + i % 5),
+                created_at=datetime(2025, 1, 1 + i % 6, 12, 0, 0)
+            ))
+        db.session.commit()
+
+        combos = [('', '')] + [(s, o) for s in ('priority', 'due_date', 'created_at') for o in ('asc', 'desc')]
+        for sort_by, order in combos:
+            base_url = f'/api/tasks?sort_by={sort_by}&order={order}'
+            full = client.get(base_url).get_json()
+            assert len(full) == 12
+
+            paged = []
+            cursor = None
+            while True:
+                url = f'{base_url}&limit=5' + (f'&cursor={cursor}' if cursor else '')
+                response = client.get(url)
+                assert response.status_code == 200
+                page = response.get_json()
+                assert len(page['data']) <= 5
+                paged.extend(page['data'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+
+            assert [t['id'] for t in paged] == [t['id'] for t in full], (sort_by, order)
+
+def test_get_tasks_pagination_validation(client):
+    with app.app_context():
+        db.session.add(Task(title="Only task", priority="High"))
+        db.session.commit()
+
+        response = client.get('/api/tasks?limit=10')
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['data']) == 1
+        assert page['next_cursor'] is None
+
+        assert client.get('/api/tasks?limit=abc').status_code == 400
+        assert client.get('/api/tasks?limit=0').status_code == 400
+        assert client.get('/api/tasks?limit=100000').status_code == 400
+
+        response_bad_cursor = client.get('/api/tasks?limit=5&cursor=not-a-cursor')
+        assert response_bad_cursor.status_code == 400
+        assert response_bad_cursor.get_json()['error'] == 'Invalid cursor'
+
+        # A cursor issued for one sort cannot be reused with another
+        db.session.add(Task(title="Second task", priority="Low"))
+        db.session.commit()
+        cursor = client.get('/api/tasks?sort_by=priority&limit=1').get_json()['next_cursor']
+        assert cursor is not None
+        response_mismatch = client.get(f'/api/tasks?sort_by=due_date&limit=1&cursor={cursor}')
+        assert response_mismatch.status_code == 400
+
+# Test that migrate-db adds the indexes to a pre-existing table without losing rows
+def test_migrate_db_adds_indexes(client):
+    with app.app_context():
+        # Recreate the task table exactly as the first release shipped it
+        db.drop_all()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE task (id INTEGER NOT NULL, title VARCHAR(200) NOT NULL, notes TEXT, "
+                "due_date DATE, priority VARCHAR(20) NOT NULL, label VARCHAR(50), "
+                "is_done BOOLEAN NOT NULL, created_at DATETIME NOT NULL, PRIMARY KEY (id))"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO task (title, priority, is_done, created_at) VALUES "
+                "('Old high', 'High', 0, '2025-01-01 00:00:00.000000'), "
+                "('Old low', 'Low', 0, '2025-01-02 00:00:00.000000'), "
+                "('Old odd', 'Someday', 0, '2025-01-03 00:00:00.000000')"
+            )
+
+        result = app.test_cli_runner().invoke(args=['migrate-db'])
+        assert result.exit_code == 0
+        assert 'ix_task_priority_created_at' in result.output
+        assert 'task.priority_rank' in result.output
+
+        index_names = {ix['name'] for ix in db.inspect(db.engine).get_indexes('task')}
+        assert {ix.name for ix in Task.__table__.indexes} <= index_names
+        # Existing rows are kept and their priority_rank is backfilled
+        ranks = {task.title: task.priority_rank for task in Task.query.all()}
+        assert ranks == {'Old high': 3, 'Old low': 1, 'Old odd': 0}
+        assert all(task.updated_at == task.created_at for task in Task.query.all())
+        # Rows that predate the search index are searchable after the rebuild
+        assert [t['title'] for t in client.get('/api/tasks?q=odd').get_json()] == ['Old odd']
+
+        # Running it again is a no-op
+        result_again = app.test_cli_runner().invoke(args=['migrate-db'])
+        assert result_again.exit_code == 0
+        assert 'Created' not in result_again.output
+
+        # Indexes no query uses any more are dropped from older databases
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("CREATE INDEX ix_task_updated_at ON task (updated_at)")
+        result_retired = app.test_cli_runner().invoke(args=['migrate-db'])
+        assert 'Dropped: ix_task_updated_at' in result_retired.output
+        assert 'ix_task_updated_at' not in {ix['name'] for ix in db.inspect(db.engine).get_indexes('task')}
+
+def test_serve_rejects_empty_pools():
+    with patch('app.PreforkServer') as server:
+        for option in ('--workers', '--threads'):
+            result = app.test_cli_runner().invoke(args=['serve', option, '0'])
+            assert result.exit_code == 2
+            assert '0 is not in the range x>=1' in result.output
+    server.assert_not_called()
+
+# Test that every filter and sort path of get_tasks is served by an index
+def test_get_tasks_query_plans_use_indexes(client):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    paths = [
+        '/api/tasks',
+        '/api/tasks?priority=High',
+        '/api/tasks?label=Work',
+        '/api/tasks?due_date_before=2025-12-31',
+        '/api/tasks?sort_by=due_date&order=asc',
+        '/api/tasks?sort_by=due_date&order=desc',
+        '/api/tasks?sort_by=created_at&order=asc',
+        '/api/tasks?priority=High&sort_by=created_at&order=asc',
+        '/api/tasks?label=Work&limit=10',
+        '/api/tasks?sort_by=priority&order=asc',
+        '/api/tasks?sort_by=priority&order=desc&limit=10',
+    ]
+    with app.app_context():
+        engine = db.engine
+        for path in paths:
+            statements.clear()
+            db.event.listen(engine, 'before_cursor_execute', capture)
+            try:
+                assert client.get(path).status_code == 200
+            finally:
+                db.event.remove(engine, 'before_cursor_execute', capture)
+
+            statement, parameters = statements[-1]
+            with engine.connect() as conn:
+                plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+            details = ' | '.join(row[-1] for row in plan)
+            assert 'USING INDEX' in details or 'USING COVERING INDEX' in details, (path, details)
+            assert 'TEMP B-TREE' not in details, (path, details)
+
+# Test the streaming mode of the task list
+def test_get_tasks_stream(client):
+    with app.app_context():
+        response_empty = client.get('/api/tasks?stream=1')
+        assert response_empty.status_code == 200
+        assert response_empty.is_streamed
+        assert response_empty.get_json() == []
+
+        for i in range(5):
+            db.session.add(Task(title=f"Stream Task {i}", priority="High" if i % 2 else "Low",
+                                created_at=datetime(2025, 1, 1 + i)))
+        db.session.commit()
+
+        with patch('app.STREAM_CHUNK_SIZE', 2):
+            response = client.get('/api/tasks?stream=true&priority=Low')
+            assert response.status_code == 200
+            assert response.mimetype == 'application/json'
+            streamed = response.get_json()
+            # Two batches of rows, then the closing bracket
+            assert len(list(client.get('/api/tasks?stream=1&priority=Low').response)) == 3
+
+        # Streaming must return exactly what the buffered list returns
+        assert streamed == client.get('/api/tasks?priority=Low').get_json()
+        assert [t['title'] for t in streamed] == ['Stream Task 4', 'Stream Task 2', 'Stream Task 0']
+
+# Test that create, list and update all serialize a task identically
+def test_task_serialization_is_shared(client):
+    created = client.post('/api/tasks', json={
+        'title': 'Serialized Task', 'notes': 'Notes', 'due_date': '2025-12-24',
+        'priority': 'High', 'label': 'Work'
+    }).get_json()['data']
+    assert set(created.keys()) == set(TASK_FIELDS)
+    assert created['due_date'] == '2025-12-24'
+    assert created['is_done'] is False
+    assert created['updated_at'] == created['created_at']
+
+    listed = client.get('/api/tasks?fields=' + ','.join(TASK_FIELDS)).get_json()
+    assert listed == [created]
+    assert client.get(f"/api/tasks/{created['id']}").get_json() == created
+
+    updated = client.put(f"/api/tasks/{created['id']}", json={'is_done': True}).get_json()
+    # Updates move updated_at and nothing else
+    assert updated == dict(created, is_done=True, updated_at=updated['updated_at'])
+    assert updated['updated_at'] > created['updated_at']
+
+# Test that the optional orjson provider produces the same JSON as Flask's default one
+def test_orjson_provider_matches_default():
+    orjson = pytest.importorskip('orjson')
+    from flask.json.provider import DefaultJSONProvider
+    from app import OrjsonProvider
+
+    payload = {"b": [1, 2.5, None, True], "a": {"due": date(2025, 12, 24), "title": "Task"}}
+    fast = OrjsonProvider(app)
+    default = DefaultJSONProvider(app)
+    assert json.loads(fast.dumps(payload)) == json.loads(default.dumps(payload))
+    assert fast.dumps(payload) == default.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    assert fast.loads('{"title": "Task"}') == {"title": "Task"}
+    # Debug mode pretty-prints with indent=2
+    assert fast.dumps(payload, indent=2) == default.dumps(payload, ensure_ascii=False, indent=2)
+    # orjson only takes str keys; the rest are left to the default provider
+    for keyed in ({1: 'a', 2: 'b'}, {None: 1}, {"tasks": {3: "Task"}}):
+        assert fast.dumps(keyed) == default.dumps(keyed, ensure_ascii=False, separators=(',', ':'))
+        assert fast.dumps(keyed, indent=2) == default.dumps(keyed, ensure_ascii=False, indent=2)
+
+# Test that endpoint responses, which go through jsonify, are encoded by orjson
+def test_responses_use_orjson(client):
+    orjson = pytest.importorskip('orjson')
+    from app import OrjsonProvider
+    if not isinstance(app.json, OrjsonProvider):
+        pytest.skip("orjson provider disabled by TASKS_JSON_ENCODER")
+
+    with app.app_context():
+        db.session.add(Task(title="Encoded Task", due_date=date(2025, 12, 24)))
+        db.session.commit()
+    with patch('orjson.dumps', wraps=orjson.dumps) as dumps:
+        response = client.get('/api/tasks')
+    assert response.status_code == 200
+    assert dumps.called
+    assert response.get_data(as_text=True).startswith('[{"created_at":')
+    assert response.get_json()[0]['due_date'] == '2025-12-24'
+
+# Test sparse fieldsets and the deferred notes column on the list endpoint
+def test_get_tasks_fields(client):
+    with app.app_context():
+        db.session.add(Task(title="Fields Task", notes="Long notes", priority="High",
+                            label="Work", due_date=date(2025, 12, 24)))
+        db.session.commit()
+
+        # notes is left out of list responses by default
+        default_task = client.get('/api/tasks').get_json()[0]
+        assert 'notes' not in default_task
+        assert default_task['title'] == 'Fields Task'
+        assert default_task['due_date'] == '2025-12-24'
+
+        sparse = client.get('/api/tasks?fields=title,priority').get_json()
+        assert sparse == [{"id": sparse[0]['id'], "title": "Fields Task", "priority": "High"}]
+
+        with_notes = client.get('/api/tasks?fields=title,notes').get_json()[0]
+        assert with_notes['notes'] == 'Long notes'
+
+        streamed = client.get('/api/tasks?fields=title,due_date&stream=1').get_json()
+        assert streamed == [{"id": sparse[0]['id'], "title": "Fields Task", "due_date": "2025-12-24"}]
+
+        response_invalid = client.get('/api/tasks?fields=title,secret')
+        assert response_invalid.status_code == 400
+        assert response_invalid.get_json()['error'] == 'Invalid fields: secret'
+
+        # Sorting on a field that was not requested still pages correctly
+        db.session.add(Task(title="Second Fields Task", priority="Low", due_date=date(2025, 12, 1)))
+        db.session.commit()
+        page = client.get('/api/tasks?fields=title&sort_by=due_date&limit=1').get_json()
+        assert page['data'] == [{"id": page['data'][0]['id'], "title": "Second Fields Task"}]
+        next_page = client.get(f"/api/tasks?fields=title&sort_by=due_date&limit=1&cursor={page['next_cursor']}").get_json()
+        assert next_page['data'][0]['title'] == 'Fields Task'
+
+# Test fetching a single task with its full record
+def test_get_single_task(client):
+    with app.app_context():
+        task = Task(title="Single Task", notes="Full notes")
+        db.session.add(task)
+        db.session.commit()
+
+        response = client.get(f'/api/tasks/{task.id}')
+        assert response.status_code == 200
+        assert response.get_json()['notes'] == 'Full notes'
+        assert response.get_json()['title'] == 'Single Task'
+
+        response_missing = client.get('/api/tasks/9999')
+        assert response_missing.status_code == 404
+        assert response_missing.get_json()['error'] == 'Task not found'
+
+# Test conditional GET on the task list
+def test_get_tasks_etag(client):
+    response = client.get('/api/tasks?priority=High')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    # A repeat read with the same ETag is answered without a body
+    response_cached = client.get('/api/tasks?priority=High', headers={'If-None-Match': etag})
+    assert response_cached.status_code == 304
+    assert response_cached.data == b''
+    assert response_cached.headers['ETag'] == etag
+
+    # Different query arguments never share an ETag
+    other_etag = client.get('/api/tasks?priority=Low').headers['ETag']
+    assert other_etag != etag
+    # ...but argument order does not matter
+    assert client.get('/api/tasks?priority=High&order=asc').headers['ETag'] == \
+        client.get('/api/tasks?order=asc&priority=High').headers['ETag']
+
+    # Every write through the API invalidates the ETag
+    task_id = client.post('/api/tasks', json={'title': 'ETag Task', 'priority': 'High'}).get_json()['data']['id']
+    response_after_create = client.get('/api/tasks?priority=High', headers={'If-None-Match': etag})
+    assert response_after_create.status_code == 200
+    assert len(response_after_create.get_json()) == 1
+    etag = response_after_create.headers['ETag']
+
+    client.put(f'/api/tasks/{task_id}', json={'is_done': True})
+    response_after_update = client.get('/api/tasks?priority=High', headers={'If-None-Match': etag})
+    assert response_after_update.status_code == 200
+    etag = response_after_update.headers['ETag']
+
+    client.delete(f'/api/tasks/{task_id}')
+    response_after_delete = client.get('/api/tasks?priority=High', headers={'If-None-Match': etag})
+    assert response_after_delete.status_code == 200
+    assert response_after_delete.get_json() == []
+
+    # Errors are not cached
+    response_error = client.get('/api/tasks?limit=abc')
+    assert response_error.status_code == 400
+    assert 'ETag' not in response_error.headers
+
+def test_get_tasks_etag_follows_calendar_for_relative_dates(client):
+    with patch('app.date') as mock_date:
+        mock_date.today.return_value = date(2025, 12, 10)
+        mock_date.side_effect = lambda *args, **kw: date(*args, **kw)
+        etag_today = client.get('/api/tasks?due_date_within_days=7').headers['ETag']
+        mock_date.today.return_value = date(2025, 12, 11)
+        response_tomorrow = client.get('/api/tasks?due_date_within_days=7', headers={'If-None-Match': etag_today})
+        assert response_tomorrow.status_code == 200
+        assert response_tomorrow.headers['ETag'] != etag_today
+
+# Test the server-side cache of list responses
+def test_get_tasks_result_cache(client):
+    stats_before = task_list_cache.stats()
+    client.post('/api/tasks', json={'title': 'Cached Task', 'priority': 'High'})
+    first = client.get('/api/tasks?priority=High')
+    assert len(first.get_json()) == 1
+
+    with patch('app._query_tasks') as mock_query:
+        second = client.get('/api/tasks?priority=High')
+        mock_query.assert_not_called()
+    assert second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert second.headers['ETag'] == first.headers['ETag']
+
+    # Writes through the API invalidate cached lists
+    client.post('/api/tasks', json={'title': 'Another Cached Task', 'priority': 'High'})
+    assert len(client.get('/api/tasks?priority=High').get_json()) == 2
+
+    stats = client.get('/api/cache/stats').get_json()['task_list']
+    assert stats['hits'] - stats_before['hits'] == 1
+    assert stats['misses'] - stats_before['misses'] == 2
+    assert stats['size'] == 1
+
+    # Streamed and failed responses are never cached
+    client.get('/api/tasks?stream=1')
+    client.get('/api/tasks?limit=abc')
+    assert client.get('/api/cache/stats').get_json()['task_list']['size'] == 1
+
+def test_large_task_lists_are_not_cached(client):
+    client.post('/api/tasks', json={'title': 'Sized Task', 'priority': 'Low'})
+    body = client.get('/api/tasks').get_data()
+    assert client.get('/api/cache/stats').get_json()['task_list']['bytes'] == len(body)
+
+    _invalidate_task_caches()
+    with patch.dict(app.config, {'TASK_LIST_CACHE_MAX_BODY': len(body) - 1}):
+        assert client.get('/api/tasks').get_data() == body
+    stats = client.get('/api/cache/stats').get_json()['task_list']
+    assert stats['size'] == 0
+    assert stats['bytes'] == 0
+
+def test_relative_date_cache_entries_expire_at_midnight(client):
+    from app import _list_cache_ttl
+    from werkzeug.datastructures import MultiDict
+
+    with patch('app.datetime') as mock_datetime:
+        mock_datetime.combine.side_effect = datetime.combine
+        mock_datetime.min = datetime.min
+        mock_datetime.now.return_value = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=23, minutes=59, seconds=50)
+        assert _list_cache_ttl(MultiDict({'due_date_within_days': '7'})) == pytest.approx(10)
+        assert _list_cache_ttl(MultiDict({'priority': 'High'})) == task_list_cache.ttl
+
+# Test bulk task creation
+def test_create_tasks_bulk(client):
+    response = client.post('/api/tasks/bulk', json=[
+        {'title': 'Bulk Task 1', 'priority': 'High', 'due_date': '2025-12-24'},
+        {'title': '   '},
+        {'title': 'Bulk Task 2', 'label': 'Work'},
+        {'title': 'Bad date', 'due_date': '24/12/2025'},
+        'not an object',
+    ])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['data']['created'] == 2
+    assert body['errors'] == [
+        {"index": 1, "error": "Title is required"},
+        {"index": 3, "error": "Invalid date format. Use YYYY-MM-DD"},
+        {"index": 4, "error": "Task must be a JSON object"},
+    ]
+
+    tasks = client.get('/api/tasks?sort_by=created_at&order=asc').get_json()
+    assert [t['title'] for t in tasks] == ['Bulk Task 1', 'Bulk Task 2']
+    assert tasks[0]['due_date'] == '2025-12-24'
+    assert tasks[1]['priority'] == 'Medium'
+    assert tasks[1]['is_done'] is False
+
+    response_not_list = client.post('/api/tasks/bulk', json={'title': 'Single'})
+    assert response_not_list.status_code == 400
+
+    response_all_invalid = client.post('/api/tasks/bulk', json=[{'title': ''}])
+    assert response_all_invalid.status_code == 400
+    assert response_all_invalid.get_json()['data']['created'] == 0
+
+def test_create_tasks_bulk_ndjson_in_chunks(client):
+    lines = [json.dumps({'title': f'NDJSON Task {i}'}) for i in range(25)]
+    lines.insert(10, '{broken json')
+    lines.insert(5, '')
+    with patch('app.BULK_CHUNK_SIZE', 7):
+        response = client.post('/api/tasks/bulk', data='\n'.join(lines) + '\n',
+                               content_type='application/x-ndjson')
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['data']['created'] == 25
+    assert body['errors'] == [{"index": 10, "error": "Invalid JSON"}]
+    with app.app_context():
+        assert Task.query.count() == 25
+
+def test_create_tasks_bulk_rejects_bad_field_types(client):
+    response = client.post('/api/tasks/bulk', json=[
+        {'title': 'Good 1', 'label': 'Work', 'notes': 'Some notes'},
+        {'title': 'Bad label', 'label': {'x': 1}},
+        {'title': 'Bad notes', 'notes': ['a']},
+        {'title': 'Long label', 'label': 'x' * 51},
+        {'title': 'Good 2', 'label': None},
+    ])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['data']['created'] == 2
+    assert body['errors'] == [
+        {"index": 1, "error": "Label must be a string"},
+        {"index": 2, "error": "Notes must be a string"},
+        {"index": 3, "error": "Label must be at most 50 characters"},
+    ]
+    assert sorted(t['title'] for t in client.get('/api/tasks').get_json()) == ['Good 1', 'Good 2']
+    assert client.post('/api/tasks', json={'title': 'Bad', 'label': 5}).status_code == 400
+
+def test_create_tasks_bulk_reads_body_before_locking(client):
+    # The write lock is taken by the version bump; it must wait for the whole upload
+    import io
+    from app import _bump_data_version
+    body = b''.join(json.dumps({'title': f'Upload {i}'}).encode() + b'\n' for i in range(3))
+    upload = io.BytesIO(body)
+
+    def bump():
+        assert upload.tell() == len(body)
+        return _bump_data_version()
+
+    with patch('app._bump_data_version', side_effect=bump) as mock_bump:
+        response = client.post('/api/tasks/bulk', input_stream=upload, content_length=len(body),
+                               content_type='application/x-ndjson')
+    assert response.status_code == 201
+    assert response.get_json()['data']['created'] == 3
+    mock_bump.assert_called_once()
+
+# Test set-based bulk update and delete
+def test_update_tasks_bulk(client):
+    with app.app_context():
+        for i in range(6):
+            db.session.add(Task(title=f"Bulk Update {i}", priority="High" if i < 3 else "Low", label="Work"))
+        db.session.commit()
+        ids = [task.id for task in Task.query.order_by(Task.id).all()]
+
+    response = client.put('/api/tasks/bulk', json={'ids': ids[:2], 'changes': {'is_done': True}})
+    assert response.status_code == 200
+    assert response.get_json() == {"data": {"updated": 2}}
+
+    response_filter = client.put('/api/tasks/bulk', json={
+        'filter': {'priority': 'Low'}, 'changes': {'label': 'Archive', 'due_date': '2025-12-24'}
+    })
+    assert response_filter.get_json() == {"data": {"updated": 3}}
+
+    tasks = {t['id']: t for t in client.get('/api/tasks').get_json()}
+    assert [tasks[i]['is_done'] for i in ids] == [True, True, False, False, False, False]
+    assert [tasks[i]['label'] for i in ids] == ['Work'] * 3 + ['Archive'] * 3
+    assert tasks[ids[5]]['due_date'] == '2025-12-24'
+
+    assert client.put('/api/tasks/bulk', json={'ids': ids, 'changes': {'title': ''}}).status_code == 400
+    assert client.put('/api/tasks/bulk', json={'ids': ids, 'changes': {'label': ['Work']}}).status_code == 400
+    assert client.put('/api/tasks/bulk', json={'ids': ids, 'changes': {}}).status_code == 400
+    assert client.put('/api/tasks/bulk', json={'changes': {'is_done': True}}).status_code == 400
+    assert client.put('/api/tasks/bulk', json={'ids': ['a'], 'changes': {'is_done': True}}).status_code == 400
+    # JSON true is not task 1
+    assert client.put('/api/tasks/bulk', json={'ids': [True], 'changes': {'is_done': True}}).status_code == 400
+    # A filter without any supported key must not update every task
+    response_empty_filter = client.put('/api/tasks/bulk', json={'filter': {'unknown': 1}, 'changes': {'is_done': True}})
+    assert response_empty_filter.status_code == 400
+    response_bad_filter = client.put('/api/tasks/bulk', json={'filter': {'due_date_within_days': -1}, 'changes': {'is_done': True}})
+    assert response_bad_filter.get_json()['error'] == 'due_date_within_days must be non-negative'
+
+def test_delete_tasks_bulk(client):
+    with app.app_context():
+        for i in range(5):
+            db.session.add(Task(title=f"Bulk Delete {i}", label="Done" if i % 2 else "Keep"))
+        db.session.commit()
+        ids = [task.id for task in Task.query.order_by(Task.id).all()]
+
+    response = client.delete('/api/tasks/bulk', json={'filter': {'label': 'Done'}})
+    assert response.status_code == 200
+    assert response.get_json() == {"data": {"deleted": 2}}
+
+    with patch('app.BULK_CHUNK_SIZE', 1):
+        response_ids = client.delete('/api/tasks/bulk', json={'ids': [ids[0], ids[2], 9999]})
+    assert response_ids.get_json() == {"data": {"deleted": 2}}
+
+    remaining = client.get('/api/tasks').get_json()
+    assert [t['title'] for t in remaining] == ['Bulk Delete 4']
+
+    assert client.delete('/api/tasks/bulk', json={'ids': [1], 'filter': {'label': 'Keep'}}).status_code == 400
+    assert client.delete('/api/tasks/bulk', json={}).status_code == 400
+    assert client.delete('/api/tasks/bulk', json={'ids': [True]}).status_code == 400
+
+# Test that readers keep making progress while a writer holds an open transaction
+def test_sqlite_readers_progress_during_write(tmp_path):
+    from app import sqlite_engine_options
+
+    uri = f"sqlite:///{tmp_path / 'concurrency.db'}"
+    engine = db.create_engine(uri, **sqlite_engine_options(uri, pool_size=5, max_overflow=5))
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)")
+            conn.exec_driver_sql("INSERT INTO item (name) VALUES ('before')")
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == 'wal'
+
+        write_open = threading.Event()
+        readers_done = threading.Event()
+        writer_saw_readers_finish = []
+
+        def writer():
+            with engine.connect() as conn:
+                # A tiny page cache forces the uncommitted pages to spill out of memory,
+                # which locks readers out entirely under a rollback journal
+                conn.exec_driver_sql("PRAGMA cache_size=5")
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                conn.exec_driver_sql(
+                    "INSERT INTO item (name) SELECT printf('%.500c', 'x') FROM "
+                    "(WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2000) SELECT i FROM n)"
+                )
+                write_open.set()
+                # Keep the write transaction open until every reader has finished
+                writer_saw_readers_finish.append(readers_done.wait(timeout=10))
+                conn.exec_driver_sql("COMMIT")
+
+        reader_counts = []
+
+        def reader():
+            write_open.wait(timeout=10)
+            with engine.connect() as conn:
+                for _ in range(20):
+                    reader_counts.append(conn.exec_driver_sql("SELECT COUNT(*) FROM item").scalar())
+
+        writer_thread = threading.Thread(target=writer)
+        reader_threads = [threading.Thread(target=reader) for _ in range(4)]
+        writer_thread.start()
+        for thread in reader_threads:
+            thread.start()
+        for thread in reader_threads:
+            thread.join(timeout=10)
+        readers_done.set()
+        writer_thread.join(timeout=10)
+
+        assert writer_saw_readers_finish == [True]
+        # Readers saw the last committed snapshot, not the uncommitted row
+        assert reader_counts == [1] * 80
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM item").scalar() == 2001
+    finally:
+        engine.dispose()
+
+# Test that priority_rank follows priority on every write path and priorities are validated
+def test_priority_rank_kept_in_sync(client):
+    task_id = client.post('/api/tasks', json={'title': 'Rank Task', 'priority': 'Low'}).get_json()['data']['id']
+    client.post('/api/tasks', json={'title': 'Default Rank Task'})
+    client.post('/api/tasks/bulk', json=[{'title': 'Bulk Rank Task', 'priority': 'High'}])
+
+    def ranks():
+        with app.app_context():
+            return {task.title: task.priority_rank for task in Task.query.all()}
+
+    assert ranks() == {'Rank Task': 1, 'Default Rank Task': 2, 'Bulk Rank Task': 3}
+
+    client.put(f'/api/tasks/{task_id}', json={'priority': 'High'})
+    assert ranks()['Rank Task'] == 3
+    client.put('/api/tasks/bulk', json={'filter': {'priority': 'High'}, 'changes': {'priority': 'Medium'}})
+    assert ranks() == {'Rank Task': 2, 'Default Rank Task': 2, 'Bulk Rank Task': 2}
+
+    with app.app_context():
+        task = Task(title='Model Rank Task', priority='High')
+        assert task.priority_rank == 3
+
+# Legacy priorities (stored before validation existed) rank below Low in both directions
+def test_sort_by_priority_with_legacy_values(client):
+    with app.app_context():
+        for title, priority in (("Legacy", "Someday"), ("Low", "Low"), ("High", "High")):
+            db.session.add(Task(title=title, priority=priority))
+        db.session.commit()
+        assert Task.query.filter_by(title="Legacy").one().priority_rank == 0
+
+    titles = lambda order: [t['title'] for t in client.get(f'/api/tasks?sort_by=priority&order={order}').get_json()]
+    assert titles('desc') == ['High', 'Low', 'Legacy']
+    assert titles('asc') == ['Legacy', 'Low', 'High']
+
+    # Cursor paging walks the same order
+    first = client.get('/api/tasks?sort_by=priority&order=asc&limit=2').get_json()
+    assert [t['title'] for t in first['data']] == ['Legacy', 'Low']
+    rest = client.get(f"/api/tasks?sort_by=priority&order=asc&limit=2&cursor={first['next_cursor']}").get_json()
+    assert [t['title'] for t in rest['data']] == ['High']
+
+def test_priority_validation(client):
+    response = client.post('/api/tasks', json={'title': 'Bad priority', 'priority': 'Whenever'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid priority. Use one of: High, Medium, Low'
+
+    task_id = client.post('/api/tasks', json={'title': 'Good priority', 'priority': 'High'}).get_json()['data']['id']
+    response_update = client.put(f'/api/tasks/{task_id}', json={'priority': 'urgent'})
+    assert response_update.status_code == 400
+    assert client.get(f'/api/tasks/{task_id}').get_json()['priority'] == 'High'
+
+    response_bulk = client.post('/api/tasks/bulk', json=[{'title': 'Bulk bad priority', 'priority': 'Soon'}])
+    assert response_bulk.get_json()['errors'][0]['error'] == 'Invalid priority. Use one of: High, Medium, Low'
+
+# Test full-text search over titles and notes
+def test_get_tasks_search(client):
+    client.post('/api/tasks', json={'title': 'Buy groceries', 'notes': 'milk and eggs', 'priority': 'Low'})
+    client.post('/api/tasks', json={'title': 'Grocery budget', 'notes': 'Review spending', 'priority': 'High'})
+    client.post('/api/tasks', json={'title': 'Weekly report', 'notes': 'Include groceries costs', 'priority': 'High'})
+    client.post('/api/tasks', json={'title': 'Café visit', 'priority': 'Medium'})
+
+    def titles(query):
+        response = client.get(f'/api/tasks?{query}')
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        return [t['title'] for t in (body['data'] if isinstance(body, dict) else body)]
+
+    # Matches titles and notes, best match first
+    assert titles('q=groceries') == ['Buy groceries', 'Weekly report']
+    # Prefix matching and every word has to match
+    assert set(titles('q=groc')) == {'Buy groceries', 'Grocery budget', 'Weekly report'}
+    assert titles('q=groc milk') == ['Buy groceries']
+    # Accents are folded
+    assert titles('q=cafe') == ['Café visit']
+    # Combines with filters and explicit sorts
+    assert titles('q=groc&priority=High&sort_by=created_at&order=asc') == ['Grocery budget', 'Weekly report']
+    # FTS syntax in user input is treated as plain words
+    assert titles('q=groceries" OR "report') == []
+
+    # Relevance ordering pages like any other sort
+    first_page = client.get('/api/tasks?q=groc&limit=2').get_json()
+    second_page = client.get(f"/api/tasks?q=groc&limit=2&cursor={first_page['next_cursor']}").get_json()
+    paged = [t['title'] for t in first_page['data'] + second_page['data']]
+    assert paged == titles('q=groc')
+    assert second_page['next_cursor'] is None
+
+    response_invalid = client.get('/api/tasks?q=!!!')
+    assert response_invalid.status_code == 400
+    assert response_invalid.get_json()['error'] == 'q must contain at least one word'
+
+def test_search_index_follows_writes(client):
+    task_id = client.post('/api/tasks', json={'title': 'Call plumber'}).get_json()['data']['id']
+    assert len(client.get('/api/tasks?q=plumber').get_json()) == 1
+
+    client.put(f'/api/tasks/{task_id}', json={'title': 'Call electrician', 'notes': 'about the lights'})
+    assert client.get('/api/tasks?q=plumber').get_json() == []
+    assert len(client.get('/api/tasks?q=lights').get_json()) == 1
+
+    client.post('/api/tasks/bulk', json=[{'title': 'Plumber invoice'}])
+    assert len(client.get('/api/tasks?q=plumber').get_json()) == 1
+    client.delete('/api/tasks/bulk', json={'filter': {'q': 'plumber'}})
+    assert client.get('/api/tasks?q=plumber').get_json() == []
+
+    client.delete(f'/api/tasks/{task_id}')
+    assert client.get('/api/tasks?q=lights').get_json() == []
+
+# Test the aggregate statistics endpoint
+def test_get_task_stats(client):
+    with patch('app.date') as mock_date:
+        mock_date.today.return_value = date(2025, 12, 10)
+        mock_date.side_effect = lambda *args, **kw: date(*args, **kw)
+
+        empty = client.get('/api/tasks/stats').get_json()
+        assert empty == {
+            "total": 0, "done": 0, "open": 0, "overdue": 0,
+            "by_priority": {"High": 0, "Medium": 0, "Low": 0},
+            "by_label": {}, "unlabeled": 0,
+        }
+
+        client.post('/api/tasks/bulk', json=[
+            {'title': 'Overdue work', 'priority': 'High', 'label': 'Work', 'due_date': '2025-12-01'},
+            {'title': 'Done overdue', 'priority': 'High', 'label': 'Work', 'due_date': '2025-12-01'},
+            {'title': 'Due today', 'priority': 'Low', 'label': 'Home', 'due_date': '2025-12-10'},
+            {'title': 'No label', 'priority': 'Medium'},
+        ])
+        client.put('/api/tasks/bulk', json={'filter': {'q': 'done'}, 'changes': {'is_done': True}})
+
+        stats = client.get('/api/tasks/stats').get_json()
+        assert stats == {
+            "total": 4, "done": 1, "open": 3, "overdue": 1,
+            "by_priority": {"High": 2, "Medium": 1, "Low": 1},
+            "by_label": {"Work": 2, "Home": 1}, "unlabeled": 1,
+        }
+
+        # Same filters as the list endpoint
+        work = client.get('/api/tasks/stats?label=Work').get_json()
+        assert work['total'] == 2
+        assert work['overdue'] == 1
+        assert client.get('/api/tasks/stats?due_date_within_days=0').get_json()['total'] == 3
+        assert client.get('/api/tasks/stats?priority=High').get_json()['by_priority'] == {"High": 2, "Medium": 0, "Low": 0}
+
+        # Repeat reads are served from the cache until the next write
+        # (the mocked calendar is years away from the real clock, so pin the midnight expiry)
+        with patch('app._seconds_until_midnight', return_value=3600):
+            client.get('/api/tasks/stats')
+            with patch('app._compute_task_stats') as mock_compute:
+                assert client.get('/api/tasks/stats').get_json() == stats
+                mock_compute.assert_not_called()
+        client.post('/api/tasks', json={'title': 'One more', 'priority': 'Low'})
+        assert client.get('/api/tasks/stats').get_json()['total'] == 5
+
+        assert client.get('/api/tasks/stats?due_date_within_days=x').status_code == 400
+
+def test_get_task_changes(client):
+    initial = client.get('/api/tasks/changes').get_json()
+    assert initial == {"changes": [], "deleted": [], "token": initial['token']}
+
+    client.post('/api/tasks/bulk', json=[{'title': f"Sync {i}", 'priority': 'Low'} for i in range(4)])
+    full = client.get('/api/tasks/changes').get_json()
+    assert [t['title'] for t in full['changes']] == ['Sync 0', 'Sync 1', 'Sync 2', 'Sync 3']
+    assert set(full['changes'][0]) == set(TASK_FIELDS)
+    ids = [t['id'] for t in full['changes']]
+    token = full['token']
+
+    # Nothing changed since the token
+    assert client.get(f'/api/tasks/changes?since={token}').get_json() == {"changes": [], "deleted": [], "token": token}
+
+    client.put(f'/api/tasks/{ids[0]}', json={'is_done': True})
+    client.put('/api/tasks/bulk', json={'ids': [ids[1]], 'changes': {'label': 'Moved'}})
+    client.delete(f'/api/tasks/{ids[2]}')
+    client.delete('/api/tasks/bulk', json={'ids': [ids[3]]})
+    client.post('/api/tasks', json={'title': 'Sync new'})
+
+    delta = client.get(f'/api/tasks/changes?since={token}').get_json()
+    assert [t['title'] for t in delta['changes']] == ['Sync 0', 'Sync 1', 'Sync new']
+    assert delta['changes'][0]['is_done'] is True
+    assert delta['changes'][1]['label'] == 'Moved'
+    assert set(ids[2:]) <= set(delta['deleted'])
+    assert int(delta['token']) > int(token)
+
+    # A no-op bulk write does not advance the token
+    client.put('/api/tasks/bulk', json={'ids': [9999], 'changes': {'is_done': True}})
+    assert client.get(f"/api/tasks/changes?since={delta['token']}").get_json()['token'] == delta['token']
+
+    with app.app_context():
+        task = db.session.get(Task, ids[0])
+        assert task.updated_at >= task.created_at
+
+    assert client.get('/api/tasks/changes?since=abc').status_code == 400
+    assert client.get('/api/tasks/changes?since=-1').status_code == 400
+    assert client.get(f"/api/tasks/changes?since={int(delta['token']) + 100}").status_code == 410
+
+def test_old_tombstones_are_pruned(client):
+    from app import TaskTombstone
+
+    ids = [client.post('/api/tasks', json={'title': f'Pruned {i}'}).get_json()['data']['id'] for i in range(3)]
+    with patch.dict(app.config, {'TOMBSTONE_RETENTION_VERSIONS': 2}):
+        token = client.get('/api/tasks/changes').get_json()['token']
+        client.delete(f'/api/tasks/{ids[0]}')
+        client.delete(f'/api/tasks/{ids[1]}')
+        client.delete(f'/api/tasks/{ids[2]}')
+        with app.app_context():
+            assert db.session.scalars(db.select(TaskTombstone.task_id)).all() == ids[1:]
+        # The first deletion is forgotten, so a token from before it cannot be served
+        assert client.get(f'/api/tasks/changes?since={token}').status_code == 410
+        assert client.get(f'/api/tasks/changes?since={int(token) + 1}').get_json()['deleted'] == ids[1:]
+
+def test_task_events_stream(client):
+    # Resume from the current position so the stream replays exactly the writes below
+    start = client.get('/api/cache/stats').get_json()['task_events']['last_event_id']
+
+    created = client.post('/api/tasks', json={'title': 'Evented', 'priority': 'High'}).get_json()['data']
+    client.put(f"/api/tasks/{created['id']}", json={'is_done': True})
+    client.post('/api/tasks/bulk', json=[{'title': 'Bulk evented'}, {'title': 'Bulk evented 2'}])
+    client.put('/api/tasks/bulk', json={'filter': {'q': 'bulk'}, 'changes': {'label': 'Bulk'}})
+    client.delete(f"/api/tasks/{created['id']}")
+    client.delete('/api/tasks/bulk', json={'filter': {'label': 'Bulk'}})
+    # Rejected writes publish nothing
+    client.post('/api/tasks', json={'title': ''})
+    client.put('/api/tasks/bulk', json={'ids': [9999], 'changes': {'is_done': True}})
+
+    response = client.get('/api/tasks/events', headers={'Last-Event-ID': start})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    body = next(response.response).decode()
+    response.close()
+
+    messages = [block.split('\n') for block in body.split('\n\n') if block.startswith('id:')]
+    events = [(lines[1][len('event: '):], json.loads(lines[2][len('data: '):])) for lines in messages]
+    assert [name for name, _ in events] == [
+        'created', 'updated', 'bulk_created', 'bulk_updated', 'deleted', 'bulk_deleted'
+    ]
+    assert events[0][1]['task']['title'] == 'Evented'
+    assert events[1][1]['task']['is_done'] is True
+    assert events[2][1]['count'] == 2
+    assert events[4][1]['id'] == created['id']
+    assert events[5][1]['count'] == 2
+    # Tokens follow the data version, so a client can catch up via /api/tasks/changes
+    tokens = [int(data['token']) for _, data in events]
+    assert tokens == sorted(tokens)
+    assert client.get(f"/api/tasks/changes?since={tokens[-1]}").get_json()['changes'] == []
+
+def test_task_events_catch_up_with_other_processes(client):
+    from event_stream import EventBroker
+
+    with patch.dict(app.config, {'TASK_EVENTS_HEARTBEAT': 0.01}):
+        response = client.get('/api/tasks/events')
+    stream = iter(response.response)
+    next(stream)
+    # Another worker process has its own broker; its writes only move the data version
+    with patch('app.task_events', EventBroker()):
+        client.post('/api/tasks', json={'title': 'Written elsewhere'})
+    token = client.get('/api/tasks/changes?since=0').get_json()['token']
+    body = next(stream).decode()
+    response.close()
+    assert body == f'event: changed\ndata: {{"token": "{token}"}}\n\n'
+
+def test_metrics_endpoint(client):
+    from app import http_requests, http_request_duration, http_request_db_queries, http_requests_in_flight, suggestions_served
+
+    created_before = http_requests.value('create_task', 'POST', '201')
+    gets_before = http_request_duration.count('get_tasks', 'GET')
+    queries_before = http_request_db_queries.count('get_tasks')
+    missing_before = http_requests.value('unmatched', 'GET', '404')
+    fallback_before = suggestions_served.value('fallback')
+
+    client.post('/api/tasks', json={'title': 'Measured'})
+    client.get('/api/tasks?limit=10')
+    client.get('/api/nope')
+    with patch('app.get_ai_suggestions', return_value={"priority": "Low", "label": "Other", "fallback": True}):
+        client.post('/api/suggest', json={'title': 'Anything'})
+
+    assert http_requests.value('create_task', 'POST', '201') == created_before + 1
+    assert http_request_duration.count('get_tasks', 'GET') == gets_before + 1
+    assert http_request_db_queries.count('get_tasks') == queries_before + 1
+    assert http_requests.value('unmatched', 'GET', '404') == missing_before + 1
+    assert suggestions_served.value('fallback') == fallback_before + 1
+    assert http_requests_in_flight.value('get_tasks') == 0
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    body = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_requests_total{endpoint="create_task",method="POST",status="201"}' in body
+    assert 'http_request_db_queries_bucket{endpoint="get_tasks",le="+Inf"}' in body
+
+def test_slow_query_log(client, caplog):
+    from app import slow_query_log
+    slow_query_log.reset()
+    client.post('/api/tasks/bulk', json=[{'title': f'Slow {i}', 'priority': 'High', 'due_date': '2025-12-01'} for i in range(3)])
+
+    # Every statement counts as slow with a zero threshold
+    with patch.dict(app.config, {'SLOW_QUERY_THRESHOLD_MS': 0}), caplog.at_level('WARNING', logger=app.logger.name):
+        client.get('/api/tasks?priority=High&due_date_before=2026-01-01&sort_by=due_date')
+
+    slow_logs = [r.getMessage() for r in caplog.records if r.getMessage().startswith('Slow query')]
+    list_query = next(message for message in slow_logs if 'FROM task' in message and 'ORDER BY' in message)
+    assert "Parameters: ['High', '2026-01-01'" in list_query
+    assert 'ix_task_' in list_query.split('Query plan:')[1]
+
+    response = client.get('/api/admin/slow-queries?limit=50')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['threshold_ms'] == 100
+    listed = next(s for s in data['statements'] if 'ORDER BY task.due_date' in s['statement'])
+    assert listed['slow_count'] == 1
+    assert 'ix_task_' in listed['slowest_plan']
+    assert listed['slowest_parameters'][:2] == ['High', '2026-01-01']
+    # Statements under the threshold are counted but carry no plan
+    insert = next(s for s in data['statements'] if s['statement'].startswith('INSERT INTO task '))
+    assert insert['slow_count'] == 0 and insert['slowest_plan'] is None
+
+    # A slow bulk insert logs a bounded summary, not every row it bound
+    caplog.clear()
+    with patch.dict(app.config, {'SLOW_QUERY_THRESHOLD_MS': 0}), caplog.at_level('WARNING', logger=app.logger.name):
+        client.post('/api/tasks/bulk', json=[{'title': f'Bulk {i}', 'notes': 'n' * 1000} for i in range(50)])
+    bulk_log = next(r.getMessage() for r in caplog.records if r.getMessage().startswith('Slow query (') and 'INSERT INTO task ' in r.getMessage())
+    assert "'rows': 50" in bulk_log and 'Bulk 1' not in bulk_log
+    assert len(bulk_log) < 2000
+    bulk_insert = next(s for s in client.get('/api/admin/slow-queries?limit=50').get_json()['statements']
+                       if s['statement'].startswith('INSERT INTO task '))
+    assert bulk_insert['slowest_parameters']['rows'] == 50
+    assert bulk_insert['slowest_parameters']['first'][0] == 'Bulk 0'
+
+    by_count = client.get('/api/admin/slow-queries?sort=count&limit=1').get_json()['statements']
+    assert len(by_count) == 1
+    assert client.get('/api/admin/slow-queries?sort=bogus').status_code == 400
+    assert client.get('/api/admin/slow-queries?limit=x').status_code == 400
+
+def test_suggest_batch_api(client):
+    fake = [{"priority": "High", "label": "Work", "fallback": False}, {"priority": "Low", "label": "Other", "fallback": True}]
+    with patch('app.get_ai_suggestions_batch', return_value=fake) as mock_batch:
+        response = client.post('/api/suggest/batch', json={'titles': ['Write report', 'Something']})
+    assert response.status_code == 200
+    assert response.get_json() == {"data": fake}
+    mock_batch.assert_called_once_with(['Write report', 'Something'])
+
+    assert client.post('/api/suggest/batch', json={'titles': []}).status_code == 400
+    assert client.post('/api/suggest/batch', json={'titles': ['ok', ' ']}).status_code == 400
+    assert client.post('/api/suggest/batch', json=['Write report']).status_code == 400
+    with patch('app.MAX_SUGGEST_BATCH', 1):
+        assert client.post('/api/suggest/batch', json={'titles': ['a', 'b']}).status_code == 400
@@ -0,0 +1,183 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app import app, db
+from asgi import Application
+
+@pytest.fixture
+def asgi_app():
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    application = Application(max_concurrent_suggestions=2, wsgi_threads=2)
+    yield application
+    application.executor.shutdown()
+    with app.app_context():
+        db.drop_all()
+
+async def call(application, method, path, body=None, query_string=b''):
+    """Drive one http request through the ASGI app and return (status, headers, body)."""
+    payload = json.dumps(body).encode() if body is not None else b''
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    disconnect = asyncio.Event()
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+        'headers': [(b'content-type', b'application/json')], 'http_version': '1.1',
+    }
+    await application(scope, receive, send)
+    start = sent[0]
+    return start['status'], dict(start['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+def test_suggest_runs_on_the_event_loop(asgi_app):
+    async def fake_suggestions(title):
+        return {"priority": "High", "label": "Work", "fallback": False}
+
+    with patch('asgi.get_ai_suggestions_async', side_effect=fake_suggestions) as mock_ai:
+        status, headers, body = asyncio.run(call(asgi_app, 'POST', '/api/suggest', {'title': 'Ship it'}))
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    assert json.loads(body) == {"priority": "High", "label": "Work", "fallback": False}
+    mock_ai.assert_called_once_with('Ship it')
+
+    status, _, body = asyncio.run(call(asgi_app, 'POST', '/api/suggest', {}))
+    assert status == 400
+    assert json.loads(body) == {"error": "Title is required for suggestions"}
+
+    with patch('asgi.get_ai_suggestions_async', side_effect=ValueError("API key missing")):
+        status, _, body = asyncio.run(call(asgi_app, 'POST', '/api/suggest', {'title': 'x'}))
+    assert status == 500
+    assert json.loads(body) == {"error": "API key missing"}
+
+def test_suggest_concurrency_is_bounded(asgi_app):
+    running = 0
+    peak = 0
+
+    async def slow_suggestions(title):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"priority": "Low", "label": "Other", "fallback": False}
+
+    async def many():
+        return await asyncio.gather(*(
+            call(asgi_app, 'POST', '/api/suggest', {'title': f'Task {i}'}) for i in range(10)
+        ))
+
+    with patch('asgi.get_ai_suggestions_async', side_effect=slow_suggestions):
+        results = asyncio.run(many())
+    assert [status for status, _, _ in results] == [200] * 10
+    assert peak == 2
+
+def test_suggest_batch_runs_on_the_event_loop(asgi_app):
+    fake = [{"priority": "High", "label": "Work", "fallback": False}, {"priority": "Low", "label": "Other", "fallback": True}]
+
+    async def fake_batch(titles):
+        return fake
+
+    with patch('asgi.get_ai_suggestions_batch_async', side_effect=fake_batch) as mock_batch:
+        status, _, body = asyncio.run(call(asgi_app, 'POST', '/api/suggest/batch', {'titles': ['Ship it', 'Other']}))
+    assert status == 200
+    assert json.loads(body) == {"data": fake}
+    mock_batch.assert_called_once_with(['Ship it', 'Other'])
+
+    status, _, body = asyncio.run(call(asgi_app, 'POST', '/api/suggest/batch', {'titles': []}))
+    assert status == 400
+    assert json.loads(body) == {"error": "titles must be a non-empty list"}
+
+def test_other_routes_go_through_flask(asgi_app):
+    async def requests():
+        created = await call(asgi_app, 'POST', '/api/tasks', {'title': 'Via ASGI', 'priority': 'High'})
+        listed = await call(asgi_app, 'GET', '/api/tasks', query_string=b'priority=High')
+        missing = await call(asgi_app, 'GET', '/api/tasks/9999')
+        return created, listed, missing
+
+    created, listed, missing = asyncio.run(requests())
+    assert created[0] == 201
+    assert json.loads(created[2])['data']['title'] == 'Via ASGI'
+    assert listed[0] == 200
+    assert [t['title'] for t in json.loads(listed[2])] == ['Via ASGI']
+    assert missing[0] == 404
+
+def test_event_streams_do_not_hold_bridge_threads(asgi_app):
+    async def open_stream():
+        disconnect = asyncio.Event()
+        received = asyncio.Queue()
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            await received.put(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/tasks/events', 'query_string': b'',
+                 'headers': [], 'http_version': '1.1'}
+        task = asyncio.ensure_future(asgi_app(scope, receive, send))
+        return task, disconnect, received
+
+    async def scenario():
+        # More open streams than the bridge has threads (2)
+        streams = [await open_stream() for _ in range(3)]
+        for _, _, received in streams:
+            start = await asyncio.wait_for(received.get(), 1)
+            assert start['status'] == 200
+            assert dict(start['headers'])[b'content-type'].startswith(b'text/event-stream')
+            assert (await asyncio.wait_for(received.get(), 1))['body'].startswith(b'retry:')
+
+        listed = await asyncio.wait_for(call(asgi_app, 'GET', '/api/tasks'), 3)
+        created = await asyncio.wait_for(call(asgi_app, 'POST', '/api/tasks', {'title': 'Streamed'}), 3)
+        event = await asyncio.wait_for(streams[0][2].get(), 3)
+
+        for task, disconnect, _ in streams:
+            disconnect.set()
+        await asyncio.wait_for(asyncio.gather(*(task for task, _, _ in streams)), 3)
+        return listed, created, event
+
+    listed, created, event = asyncio.run(scenario())
+    assert listed[0] == 200
+    assert created[0] == 201
+    assert b'event: created' in event['body'] and b'"Streamed"' in event['body']
+    from app import task_events
+    assert task_events.stats()['subscribers'] == 0
+
+def test_streamed_responses_keep_their_context(asgi_app):
+    from flask import appcontext_popped, appcontext_pushed
+    with app.app_context():
+        from app import Task
+        for i in range(3):
+            db.session.add(Task(title=f"Streamed {i}"))
+        db.session.commit()
+
+    pushed, popped = [], []
+
+    async def stream_twice():
+        return [await call(asgi_app, 'GET', '/api/tasks', query_string=b'stream=1&sort_by=created_at&order=asc')
+                for _ in range(2)]
+
+    with appcontext_pushed.connected_to(lambda sender, **extra: pushed.append(sender), app), \
+            appcontext_popped.connected_to(lambda sender, **extra: popped.append(sender), app):
+        responses = asyncio.run(stream_twice())
+    for status, _, body in responses:
+        assert status == 200
+        assert [t['title'] for t in json.loads(body)] == ['Streamed 0', 'Streamed 1', 'Streamed 2']
+    # Every context is popped at the end of its stream, so Flask's teardown runs
+    assert pushed and len(popped) == len(pushed)
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+from event_stream import EventBroker, format_sse
+
+def test_format_sse():
+    assert format_sse("created", '{"id": 1}', "a-1") == 'id: a-1\nevent: created\ndata: {"id": 1}\n\n'
+    assert format_sse("reset", "{}") == "event: reset\ndata: {}\n\n"
+
+def test_new_subscriber_only_gets_new_events():
+    broker = EventBroker(maxlen=10)
+    broker.publish("created", "1")
+    stream = broker.stream(heartbeat=0.01)
+    assert next(stream) == "retry: 3000\n\n"
+    assert next(stream) == ": heartbeat\n\n"
+    event_id = broker.publish("deleted", "2")
+    assert next(stream) == format_sse("deleted", "2", event_id)
+    assert broker.stats()["subscribers"] == 1
+    stream.close()
+    assert broker.stats()["subscribers"] == 0
+
+def test_resume_from_last_event_id():
+    broker = EventBroker(maxlen=10)
+    first = broker.publish("created", "1")
+    second = broker.publish("updated", "2")
+    third = broker.publish("deleted", "3")
+    stream = broker.stream(last_event_id=first, heartbeat=0.01)
+    assert next(stream) == "retry: 3000\n\n" + format_sse("updated", "2", second) + format_sse("deleted", "3", third)
+    # Resuming from the newest id replays nothing
+    latest = broker.stream(last_event_id=third, heartbeat=0.01)
+    assert next(latest) == "retry: 3000\n\n"
+    assert next(latest) == ": heartbeat\n\n"
+
+def test_unknown_or_evicted_id_resets():
+    broker = EventBroker(maxlen=2)
+    first = broker.publish("created", "1")
+    for data in ("2", "3", "4"):
+        broker.publish("created", data)
+    reset = format_sse("reset", "{}", broker.last_event_id)
+    for last_event_id in (first, "other-epoch-1", "garbage", broker.last_event_id + "9"):
+        assert next(broker.stream(last_event_id=last_event_id)) == "retry: 3000\n\n" + reset
+    assert broker.stats()["resets"] == 4
+
+def test_slow_subscriber_falling_out_of_the_buffer_resets():
+    broker = EventBroker(maxlen=2)
+    stream = broker.stream(heartbeat=0.01)
+    next(stream)
+    for i in range(3):
+        broker.publish("created", str(i))
+    assert next(stream) == format_sse("reset", "{}", broker.last_event_id)
+
+def test_publish_wakes_waiting_subscriber():
+    broker = EventBroker()
+    stream = broker.stream(heartbeat=30)
+    next(stream)
+    received = []
+    reader = threading.Thread(target=lambda: received.append(next(stream)))
+    reader.start()
+    event_id = broker.publish("created", "1")
+    reader.join(timeout=5)
+    assert received == [format_sse("created", "1", event_id)]
+
+def test_async_stream_is_woken_by_publishing_threads():
+    broker = EventBroker()
+    old_id = broker.publish("created", "0")
+
+    async def subscribe():
+        stream = broker.astream(last_event_id=old_id, heartbeat=30)
+        first = await stream.__anext__()
+        # Published from another thread while the subscriber waits
+        threading.Timer(0.05, broker.publish, ("updated", "1")).start()
+        second = await asyncio.wait_for(stream.__anext__(), 5)
+        assert broker.stats()["subscribers"] == 1
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(subscribe())
+    assert first == "retry: 3000\n\n"
+    assert second == format_sse("updated", "1", broker.last_event_id)
+    assert broker.stats()["subscribers"] == 0
+
+    async def heartbeat():
+        stream = broker.astream(heartbeat=0.01)
+        await stream.__anext__()
+        beat = await stream.__anext__()
+        await stream.aclose()
+        return beat
+
+    assert asyncio.run(heartbeat()) == ": heartbeat\n\n"
+
+def test_writes_by_other_processes_send_changed():
+    version = [5]
+    broker = EventBroker()
+    stream = broker.stream(heartbeat=0.01, version=lambda: version[0])
+    next(stream)
+    assert next(stream) == ": heartbeat\n\n"
+    # Another process wrote; this broker never saw an event for it
+    version[0] = 6
+    assert next(stream) == format_sse("changed", '{"token": "6"}')
+    assert next(stream) == ": heartbeat\n\n"
+    # A local event already carries the token, so nothing more is sent for it
+    version[0] = 7
+    event_id = broker.publish("created", "1", token=7)
+    assert next(stream) == format_sse("created", "1", event_id)
+    stream.close()
+
+    async def subscribe():
+        stream = broker.astream(heartbeat=0.01, version=lambda: version[0])
+        await stream.__anext__()
+        version[0] = 8
+        changed = await stream.__anext__()
+        await stream.aclose()
+        return changed
+
+    assert asyncio.run(subscribe()) == format_sse("changed", '{"token": "8"}')
+    assert broker.stats()["catch_ups"] == 2
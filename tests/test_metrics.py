@@ -0,0 +1,50 @@
+import pytest
+
+from metrics import Registry
+
+def test_counter_and_gauge():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests.', ('method', 'status'))
+    in_flight = registry.gauge('in_flight', 'In flight.')
+    requests.inc('GET', '200')
+    requests.inc('GET', '200')
+    requests.inc('POST', '201', amount=3)
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    assert requests.value('GET', '200') == 2
+    assert registry.render() == (
+        '# HELP requests_total Requests.\n'
+        '# TYPE requests_total counter\n'
+        'requests_total{method="GET",status="200"} 2\n'
+        'requests_total{method="POST",status="201"} 3\n'
+        '# HELP in_flight In flight.\n'
+        '# TYPE in_flight gauge\n'
+        'in_flight 1\n'
+    )
+    in_flight.set(7)
+    assert in_flight.value() == 7
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency.', ('endpoint',), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, 'get_tasks')
+
+    assert latency.count('get_tasks') == 4
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{endpoint="get_tasks",le="0.1"} 2',
+        'latency_seconds_bucket{endpoint="get_tasks",le="1"} 3',
+        'latency_seconds_bucket{endpoint="get_tasks",le="+Inf"} 4',
+        'latency_seconds_sum{endpoint="get_tasks"} 3.65',
+        'latency_seconds_count{endpoint="get_tasks"} 4',
+    ]
+
+def test_label_values_are_escaped_and_checked():
+    registry = Registry()
+    errors = registry.counter('errors_total', 'Errors.', ('message',))
+    errors.inc('say "hi"\\\n')
+    assert 'errors_total{message="say \\"hi\\"\\\\\\n"} 1' in registry.render()
+    with pytest.raises(ValueError):
+        errors.inc('a', 'b')
@@ -0,0 +1,54 @@
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+SERVER_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+from prefork_server import PreforkServer
+
+def app(environ, start_response):
+    if environ['PATH_INFO'] == '/slow':
+        time.sleep(1)
+    body = str(environ['wsgi.multiprocess']).encode()
+    start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', str(len(body)))])
+    return [body]
+
+def warm_up():
+    print('warmed up', file=sys.stderr, flush=True)
+
+PreforkServer(app, port=0, workers=2, threads=2, graceful_timeout=5, warm_up=warm_up).run()
+"""
+
+def start_server():
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    process = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT.format(root=root)],
+                               stderr=subprocess.PIPE, text=True)
+    assert process.stderr.readline().strip() == 'warmed up'
+    port = int(re.search(r':(\d+) with 2 workers', process.stderr.readline()).group(1))
+    return process, f"http://127.0.0.1:{port}"
+
+def test_prefork_server_serves_and_drains_on_sigterm():
+    process, url = start_server()
+    try:
+        assert urllib.request.urlopen(f"{url}/", timeout=10).read() == b'True'
+
+        slow = {}
+        request = threading.Thread(target=lambda: slow.update(
+            body=urllib.request.urlopen(f"{url}/slow", timeout=10).read()
+        ))
+        request.start()
+        time.sleep(0.3)
+        process.send_signal(signal.SIGTERM)
+        request.join()
+        # The in-flight request finished before the workers exited
+        assert slow['body'] == b'True'
+        assert process.wait(timeout=10) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
@@ -0,0 +1,63 @@
+from query_log import SlowQueryLog, format_query_plan, normalize_statement, summarize_parameters
+
+def test_normalize_statement():
+    assert normalize_statement("SELECT *\n  FROM task\n WHERE id IN (?, ?, ?) AND label = 'Work' LIMIT 50") == \
+        "SELECT * FROM task WHERE id IN (?, ...) AND label = ? LIMIT ?"
+    assert normalize_statement("SELECT * FROM task WHERE id IN (?, ?)") == \
+        normalize_statement("SELECT * FROM task WHERE id IN (?, ?, ?, ?)")
+    assert normalize_statement("INSERT INTO task (a, b) VALUES (?, ?), (?, ?), (?, ?)") == \
+        "INSERT INTO task (a, b) VALUES (?, ...), ..."
+    # Digits inside identifiers are kept
+    assert normalize_statement("SELECT task_fts.rank FROM t1") == "SELECT task_fts.rank FROM t1"
+
+def test_summarize_parameters():
+    assert summarize_parameters(('High', 3, None)) == ['High', 3, None]
+    assert summarize_parameters(['x' * 150])[0] == 'x' * 100 + '... (150 chars)'
+    assert summarize_parameters([b'\x00' * 10]) == ['<10 bytes>']
+    assert summarize_parameters(list(range(25)))[-2:] == [19, '... (5 more)']
+    assert summarize_parameters({'title': 'y' * 101})['title'].endswith('... (101 chars)')
+    # executemany keeps the row count and the first row only
+    rows = [('Task %d' % i, 'n' * 500) for i in range(1000)]
+    assert summarize_parameters(rows, executemany=True) == {
+        "rows": 1000, "first": ['Task 0', 'n' * 100 + '... (500 chars)'],
+    }
+    assert summarize_parameters([], executemany=True) == {"rows": 0, "first": None}
+
+def test_format_query_plan():
+    rows = [(2, 0, 0, 'SEARCH task USING INDEX ix_task_due_date (due_date<?)'),
+            (10, 0, 0, 'USE TEMP B-TREE FOR ORDER BY'),
+            (15, 2, 0, 'CORRELATED SCALAR SUBQUERY')]
+    assert format_query_plan(rows) == (
+        'SEARCH task USING INDEX ix_task_due_date (due_date<?)\n'
+        'USE TEMP B-TREE FOR ORDER BY\n'
+        '  CORRELATED SCALAR SUBQUERY'
+    )
+
+def test_slow_query_log_aggregates_and_ranks():
+    log = SlowQueryLog()
+    log.record("SELECT * FROM task WHERE id = ?", 0.001)
+    log.record("SELECT * FROM task WHERE id = ?", 0.003)
+    log.record("SELECT *  FROM task WHERE id = ?", 0.2, [5], "SEARCH task USING INTEGER PRIMARY KEY (rowid=?)")
+    for _ in range(5):
+        log.record("SELECT count(*) FROM task", 0.01)
+
+    slowest = log.top(1)[0]
+    assert slowest["statement"] == "SELECT * FROM task WHERE id = ?"
+    assert slowest["count"] == 3
+    assert slowest["slow_count"] == 1
+    assert round(slowest["max_ms"]) == 200
+    assert round(slowest["avg_ms"]) == 68
+    assert slowest["slowest_parameters"] == [5]
+    assert slowest["slowest_plan"].startswith("SEARCH task")
+
+    assert log.top(1, sort='count')[0]["statement"] == "SELECT count(*) FROM task"
+    log.reset()
+    assert log.top() == []
+
+def test_slow_query_log_keeps_the_slowest_statements_when_full():
+    log = SlowQueryLog(max_statements=2)
+    log.record("SELECT 1 FROM a", 0.001)
+    log.record("SELECT 1 FROM b", 0.005)
+    log.record("SELECT 1 FROM c", 0.003)  # replaces a
+    log.record("SELECT 1 FROM d", 0.0001)  # faster than everything kept, dropped
+    assert [stats["statement"] for stats in log.top()] == ["SELECT ? FROM b", "SELECT ? FROM c"]
@@ -0,0 +1,74 @@
+from suggestion_cache import SuggestionCache, normalize_title
+
+MODEL = {"priority": "Low", "label": "Shopping", "fallback": False}
+FALLBACK = {"priority": "Low", "label": "Other", "fallback": True}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_normalize_title():
+    assert normalize_title("  Buy   Groceries! ") == "buy groceries"
+    assert normalize_title("Weekly report.") == normalize_title("weekly REPORT")
+
+def test_memory_tier():
+    cache = SuggestionCache()
+    assert cache.get("Buy groceries") is None
+    cache.set("Buy groceries", MODEL)
+    assert cache.get("buy  groceries!") == MODEL
+    # Callers get copies and cannot change the cached entry
+    cache.get("buy groceries")["label"] = "Changed"
+    assert cache.get("buy groceries") == MODEL
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.75
+    assert stats["persistent"] is False
+
+def test_fallbacks_never_mask_model_answers(tmp_path):
+    cache = SuggestionCache(db_path=str(tmp_path / "suggestions.db"))
+    cache.set("Buy groceries", FALLBACK)
+    assert cache.get("Buy groceries") == FALLBACK
+    assert cache.stats()["fallback_hits"] == 1
+    # Fallbacks stay in memory only
+    assert cache.stats()["db_size"] == 0
+
+    cache.set("Buy groceries", MODEL)
+    assert cache.get("Buy groceries") == MODEL
+    # A later fallback for the same title does not replace the model answer
+    cache.set("Buy groceries", FALLBACK)
+    assert cache.get("Buy groceries") == MODEL
+
+def test_fallbacks_expire_quickly():
+    cache = SuggestionCache(fallback_ttl=0)
+    cache.set("Buy groceries", FALLBACK)
+    assert cache.get("Buy groceries") is None
+
+def test_persistent_tier_survives_restart_and_expires(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "suggestions.db")
+    SuggestionCache(db_path=path, ttl=60, clock=clock).set("Weekly report", MODEL)
+
+    restarted = SuggestionCache(db_path=path, ttl=60, clock=clock)
+    assert restarted.get("weekly report") == MODEL
+    assert restarted.get("weekly report") == MODEL
+    assert restarted.stats()["db_hits"] == 1
+    assert restarted.stats()["memory_hits"] == 1
+
+    clock.now += 61
+    assert SuggestionCache(db_path=path, ttl=60, clock=clock).get("weekly report") is None
+
+def test_persistent_tier_size_limit(tmp_path):
+    clock = FakeClock()
+    cache = SuggestionCache(db_path=str(tmp_path / "suggestions.db"), db_max_rows=3, clock=clock)
+    for i in range(10):
+        clock.now += 1
+        cache.set(f"Task {i}", MODEL)
+    assert cache.stats()["db_size"] == 3
+    fresh = SuggestionCache(db_path=str(tmp_path / "suggestions.db"), clock=clock)
+    assert fresh.get("Task 9") == MODEL
+    assert fresh.get("Task 0") is None
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from suggestion_rules import KeywordClassifier
+
+# Outputs of the original substring rules for every keyword they had, pinned
+# before the rules became a table
+PINNED = {
+    "Fix the urgent bug": ("High", "Urgent"),
+    "Call mom now": ("High", "Urgent"),
+    "Critical security patch": ("High", "Urgent"),
+    "Team meeting notes": ("Medium", "Work"),
+    "Quarterly report": ("Medium", "Work"),
+    "Finish work on the deck": ("Medium", "Work"),
+    "Buy groceries": ("Low", "Shopping"),
+    "Shop for shoes": ("Low", "Shopping"),
+    "Go shopping": ("Low", "Shopping"),
+    "Study chapter 3": ("Medium", "Study"),
+    "Read the RFC": ("Medium", "Study"),
+    "Learn Rust": ("Medium", "Study"),
+    "Home insurance": ("Low", "Home"),
+    "Clean the kitchen": ("Low", "Home"),
+    "Weekend chores": ("Low", "Home"),
+    "Health check": ("Medium", "Health"),
+    "Doctor appointment": ("Medium", "Health"),
+    "Exercise for 30 minutes": ("Medium", "Health"),
+    "Finance review": ("High", "Finance"),
+    "Electricity bill": ("High", "Finance"),
+    "Pay bills online": ("High", "Finance"),
+    "Random task without keywords": ("Low", "Other"),
+    # Earlier rules win, wherever their keyword is in the title
+    "Buy printer paper for the meeting": ("Medium", "Work"),
+    "Pay rent urgent": ("High", "Urgent"),
+    "Reading list for work": ("Medium", "Work"),
+    # Plurals and listed inflections still match
+    "Weekly meetings": ("Medium", "Work"),
+    "Cleaning day": ("Low", "Home"),
+    "Doctors' notes": ("Medium", "Health"),
+}
+
+@pytest.mark.parametrize("title, expected", PINNED.items())
+def test_default_rules_keep_existing_outputs(title, expected):
+    assert KeywordClassifier().classify(title) == expected
+
+def test_keywords_match_whole_words():
+    classifier = KeywordClassifier()
+    # Substring matching used to turn these into Urgent, Finance, Work and Study
+    assert classifier.classify("I know the answer") == ("Low", "Other")
+    assert classifier.classify("Fix the display") == ("Low", "Other")
+    assert classifier.classify("Network upgrade") == ("Low", "Other")
+    assert classifier.classify("Already done") == ("Low", "Other")
+    assert classifier.classify("URGENT: call back") == ("High", "Urgent")
+
+def test_rules_from_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "rules": [
+            {"priority": "High", "label": "Family", "keywords": ["mom", "birthday party"]},
+            {"priority": "Low", "label": "Garden", "keywords": ["lawn"]},
+        ],
+        "default": {"priority": "Medium", "label": "Inbox"},
+    }))
+    classifier = KeywordClassifier.from_file(path)
+    assert classifier.classify("Mow the lawn for Mom") == ("High", "Family")
+    assert classifier.classify("Plan birthday   party") == ("High", "Family")
+    assert classifier.classify("Mow the lawn") == ("Low", "Garden")
+    assert classifier.classify("Buy groceries") == ("Medium", "Inbox")
+
+    path.write_text(json.dumps({"rules": [{"label": "Garden", "keywords": ["lawn"]}]}))
+    with pytest.raises(ValueError):
+        KeywordClassifier.from_file(path)
@@ -0,0 +1,82 @@
+from ttl_cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_get_and_set():
+    cache = TTLCache(maxsize=2, ttl=10)
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("short", 2, ttl=1)
+    clock.now = 2
+    assert cache.get("short") is None
+    assert cache.get("a") == 1
+    clock.now = 5
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 2
+    assert stats["size"] == 0
+
+def test_zero_size_disables_cache():
+    cache = TTLCache(maxsize=0, ttl=5)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_delete_clear_and_hit_rate():
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["hit_rate"] == 0.5
+    cache.clear()
+    assert cache.get("b") is None
+
+def test_byte_budget():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock, maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"5678")
+    cache.set("c", b"90ab")
+    # 12 bytes do not fit in 10, so the oldest entry goes
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+    # A value over the whole budget is not stored
+    cache.set("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.get("b") == b"5678"
+    cache.set("b", b"56")
+    cache.delete("c")
+    assert cache.stats()["bytes"] == 2
+    clock.now = 5
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["bytes"] == 0
+    assert stats["maxbytes"] == 10